@@ -10,6 +10,7 @@ from resources.recommendations import recs_bp
 from resources.activity_logs import activity_bp
 from routes.dashboard import dashboard_bp
 from utils import setup_error_handling, ResponseTemplate, ValidationHelper, ErrorHandler
+from utils.db_pool import build_engine_options
 import config
 
 def create_app():
@@ -20,6 +21,11 @@ def create_app():
     # -----------------------------
     app.config["SQLALCHEMY_DATABASE_URI"] = config.DATABASE_URL
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = build_engine_options(config.DATABASE_URL)
+    if config.DATABASE_REPLICA_URL:
+        app.config["SQLALCHEMY_BINDS"] = {
+            "replica": {"url": config.DATABASE_REPLICA_URL, **build_engine_options(config.DATABASE_REPLICA_URL)}
+        }
     app.config["JWT_SECRET_KEY"] = config.JWT_SECRET_KEY
     app.config["UPLOAD_FOLDER"] = os.path.join(os.getcwd(), "uploads")
     app.config["MAIL_SENDER"] = os.getenv("MAIL_SENDER", "no-reply@clientsphere.local")
@@ -249,6 +255,8 @@ def create_app():
     from routes.generate_charts import charts_bp
     from routes.analysis import analysis_bp
     from routes.modeling import modeling_bp
+    from routes.metrics import metrics_bp
+    from routes.cube import cube_bp
 
     # ✅ Make sure upload route matches React fetch URL
     app.register_blueprint(upload_bp, url_prefix="/api")  # final upload URL: /api/upload
@@ -256,6 +264,8 @@ def create_app():
     app.register_blueprint(charts_bp, url_prefix="/api")
     app.register_blueprint(analysis_bp, url_prefix="/api/analysis")
     app.register_blueprint(modeling_bp, url_prefix="/api/model")
+    app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
+    app.register_blueprint(cube_bp, url_prefix="/api")
 
     return app
 
@@ -6,6 +6,7 @@ Script to clear the database and restore the original dataset
 from app import create_app
 from models import db, ClientRecord
 from ml_loader import load_clients
+from utils.data_version import bump_data_version
 import os
 
 def clear_and_restore():
@@ -17,6 +18,7 @@ def clear_and_restore():
         
         # Delete all existing client records
         ClientRecord.query.delete()
+        bump_data_version()
         db.session.commit()
         
         print("✅ Cleared all client data from database")
@@ -0,0 +1,54 @@
+"""
+Shared pytest fixtures for the Backend tests.
+
+Tests that touch the database get a throwaway SQLite app; config overrides
+and temporary directories are undone by pytest after each test.
+"""
+
+import pytest
+
+import config
+from app import create_app
+from models import db
+from utils import data_version
+from utils.circuit_breaker import db_breaker
+
+
+def _reset_data_versions():
+    # Every test database starts at version 0, so drop what earlier tests cached
+    with data_version._lock:
+        data_version._observed.clear()
+    for cache in list(data_version._caches):
+        cache.clear()
+
+
+@pytest.fixture
+def override_config(monkeypatch):
+    """Set config attributes for one test: override_config(NAME=value, ...)."""
+    def _override(**values):
+        for name, value in values.items():
+            monkeypatch.setattr(config, name, value)
+    return _override
+
+
+@pytest.fixture
+def sqlite_app(tmp_path, override_config):
+    """
+    App bound to a fresh SQLite database under tmp_path, with its tables
+    created, snapshots written under tmp_path and version polling disabled.
+    Writes do not queue chart regeneration (it draws into the real charts dir).
+    """
+    override_config(
+        DATABASE_URL=f"sqlite:///{tmp_path / 'app.db'}",
+        SNAPSHOT_DIR=str(tmp_path / "snapshots"),
+        DATA_VERSION_POLL_MS=0,
+        CHARTS_REGENERATE_ON_WRITE=False,
+    )
+    _reset_data_versions()
+    db_breaker.record_success()
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    yield app
+    _reset_data_versions()
+    db_breaker.record_success()
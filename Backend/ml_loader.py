@@ -1,6 +1,11 @@
 import os
+import json
+import hashlib
 import pandas as pd
+import config
 from models import db, ClientRecord
+from utils.data_version import VersionedCache, bump_data_version, file_stamp
+from utils.dataset_snapshot import attach_snapshot, publish_snapshot, plain_copy
 
 # -------------------------------------------------------------------
 # Configuration
@@ -56,6 +61,7 @@ def load_clients(app, csv_path: str = CSV_PATH):
                 )
                 db.session.add(new_rec)
 
+        bump_data_version()
         db.session.commit()
         print(f"✅ Loaded {len(df)} client records into the database.")
 
@@ -64,16 +70,76 @@ def load_clients(app, csv_path: str = CSV_PATH):
 # 2️⃣ Load Preprocessed Dataset
 # -------------------------------------------------------------------
 
+_dataset_cache = VersionedCache()
+_last_good = {}  # absolute path -> last frame that parsed cleanly
+
+
+def _read_csv_consistent(file_path: str, stamp):
+    """
+    Parse `file_path`, or return None if it was torn by a non-atomic writer.
+
+    A read is torn when parsing fails or the file's stamp moved while we were
+    reading it; callers then keep serving the previous good frame.
+    """
+    try:
+        df = pd.read_csv(file_path)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        print(f"⚠️ Dataset '{file_path}' could not be parsed, likely mid-write: {e}")
+        return None
+    if file_stamp(file_path) != stamp:
+        print(f"⚠️ Dataset '{file_path}' changed while it was being read.")
+        return None
+    return df
+
+
 def load_dataset(file_path: str = CSV_PATH):
     """
     Load the preprocessed dataset into a pandas DataFrame.
+
+    Parsed frames are cached per process, keyed by the file's mtime/size and
+    the clients data version, so repeated requests skip the CSV parse. With
+    snapshots enabled the cached frame is a memory-mapped view shared by all
+    workers, and only the first worker to see a new file parses it. If the
+    file is caught mid-overwrite, the previous good frame is served instead.
     """
-    if not os.path.exists(file_path):
+    stamp = file_stamp(file_path)
+    if stamp is None:
         raise FileNotFoundError(f"Dataset file not found: {file_path}")
 
-    df = pd.read_csv(file_path)
-    print(f"✅ Loaded dataset from '{file_path}' with {len(df)} rows.")
-    return df
+    def _read():
+        source = json.dumps(stamp)
+        dataset = "csv-" + hashlib.sha1(stamp[0].encode("utf-8")).hexdigest()[:12]
+        if config.USE_DATASET_SNAPSHOTS:
+            snapshot = attach_snapshot(dataset)
+            if snapshot is not None and snapshot.source == source:
+                _last_good[stamp[0]] = snapshot.frame
+                return snapshot.frame
+
+        df = _read_csv_consistent(file_path, stamp)
+        if df is None:
+            if stamp[0] in _last_good:
+                return None
+            # No earlier copy to fall back on: surface the real parse error
+            df = pd.read_csv(file_path)
+        print(f"✅ Loaded dataset from '{file_path}' with {len(df)} rows.")
+        _last_good[stamp[0]] = df
+        if config.USE_DATASET_SNAPSHOTS:
+            try:
+                snapshot = publish_snapshot(df, 0, source=source, dataset=dataset)
+                if snapshot is not None:
+                    _last_good[stamp[0]] = snapshot.frame
+                    return snapshot.frame
+            except OSError as e:
+                print(f"Snapshot publish failed for '{file_path}': {e}")
+        return df
+
+    frame = _dataset_cache.get(("dataset", stamp), _read)
+    if frame is None:
+        # Torn read: serve the previous good frame, but don't cache it under
+        # the new stamp, so the next request parses the finished file
+        _dataset_cache.discard(("dataset", stamp))
+        frame = _last_good[stamp[0]]
+    return plain_copy(frame)
 
 
 # -------------------------------------------------------------------
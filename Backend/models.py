@@ -44,3 +44,18 @@ class ClientRecord(db.Model):
     tx_count = db.Column(db.Integer)
     cluster_label = db.Column(db.Integer, nullable=True)
     client_metadata = db.Column(db.JSON)
+
+
+class DataVersion(db.Model):
+    """Monotonic version stamp bumped by every write path for a dataset.
+
+    Each worker polls this table (see utils.data_version) to decide when its
+    in-memory caches are stale, so no external broker is needed.
+    """
+    __tablename__ = "data_versions"
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DataVersion {self.name}={self.version}>"
@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify, send_from_directory, current_app
+from sqlalchemy.orm import Session
 from models import ClientRecord, db
 from ml_loader import load_dataset
 from utils import ResponseTemplate, ErrorHandler
+from utils.read_routing import analytics_read
 import os
 
 # Define the Blueprint (only once)
@@ -14,13 +16,16 @@ clusters_bp = Blueprint("clusters", __name__)
 @clusters_bp.route("/summary", methods=["GET"])
 def cluster_summary():
     """Return aggregated cluster counts and basic stats from the database."""
+    def _query(engine):
+        with Session(engine) as session:
+            return (
+                session.query(ClientRecord.cluster_label, db.func.count(ClientRecord.id))
+                .group_by(ClientRecord.cluster_label)
+                .all()
+            )
+
     try:
-        rows = (
-            ClientRecord.query
-            .with_entities(ClientRecord.cluster_label, db.func.count(ClientRecord.id))
-            .group_by(ClientRecord.cluster_label)
-            .all()
-        )
+        rows = analytics_read(_query)
         summary = [{"cluster": r[0], "count": r[1]} for r in rows]
         
         return ResponseTemplate.success(
@@ -35,18 +40,22 @@ def cluster_summary():
 @clusters_bp.route("/clients/<int:cluster_label>", methods=["GET"])
 def clients_in_cluster(cluster_label):
     """Return all clients belonging to a given cluster."""
+    def _query(engine):
+        with Session(engine) as session:
+            recs = session.query(ClientRecord).filter_by(cluster_label=cluster_label).all()
+            return [
+                {
+                    "client_id": r.client_id,
+                    "age": r.age,
+                    "balance": r.balance,
+                    "tx_count": r.tx_count,
+                    "client_metadata": r.client_metadata,
+                }
+                for r in recs
+            ]
+
     try:
-        recs = ClientRecord.query.filter_by(cluster_label=cluster_label).all()
-        clients = [
-            {
-                "client_id": r.client_id,
-                "age": r.age,
-                "balance": r.balance,
-                "tx_count": r.tx_count,
-                "client_metadata": r.client_metadata,
-            }
-            for r in recs
-        ]
+        clients = analytics_read(_query)
         
         return ResponseTemplate.success(
             message=f"Clients in cluster {cluster_label} retrieved successfully",
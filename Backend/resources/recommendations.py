@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from models import ClientRecord
+from routes.graph_data import lookup_client
 recs_bp = Blueprint("recs", __name__)
 
 # rule-based recommendation for demonstration
@@ -16,10 +17,20 @@ def recs_for_cluster(cluster):
 
 @recs_bp.route("/for-client/<client_id>", methods=["GET"])
 def recs_for_client(client_id: str):
-    rec = ClientRecord.query.filter_by(client_id=str(client_id)).first()
-    if not rec or rec.cluster_label is None:
+    # Hashed lookup in the cached client frame; the DB is only hit for
+    # clients that are not in the current snapshot yet
+    record = lookup_client(client_id)
+    if record is not None:
+        label = record.get("cluster_label")
+    else:
+        rec = ClientRecord.query.filter_by(client_id=str(client_id)).first()
+        label = rec.cluster_label if rec else None
+    if label is None:
         return jsonify({"client_id": client_id, "recommendations": [], "cluster": None})
-    cluster = int(rec.cluster_label)
+    try:
+        cluster = int(label)
+    except (TypeError, ValueError):
+        cluster = label  # named segments (e.g. "gold") have no rule set
     return jsonify({
         "client_id": client_id,
         "cluster": cluster,
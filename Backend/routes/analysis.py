@@ -1,11 +1,13 @@
 from flask import Blueprint, jsonify, request
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from scipy import stats
 
-from ml_loader import load_dataset
-from preprocessing import prepare_features, build_numeric_preprocess_pipeline
+from routes.graph_data import CSV_FALLBACK, current_clients_frame, get_clients_frame
+from utils.data_version import CLIENTS_DATASET, file_stamp, get_data_version
+from utils.correlation import CORRELATION_METHODS, cached_correlation
+from utils.anova import cached_anova
+from utils.association import cached_association
+from utils.feature_jobs import JobParamsError, get_job, job_key, load_result, normalize_params, submit_job
 
 
 analysis_bp = Blueprint("analysis", __name__)
@@ -13,50 +15,77 @@ analysis_bp = Blueprint("analysis", __name__)
 
 @analysis_bp.route("/correlation", methods=["GET"])
 def correlation_matrix():
-    df = load_dataset()
-    numeric_df = df.select_dtypes(include=[np.number])
-    corr = numeric_df.corr(numeric_only=True).fillna(0.0)
-    return jsonify({"columns": corr.columns.tolist(), "matrix": corr.values.tolist()})
+    method = request.args.get("method", "pearson").lower()
+    if method not in CORRELATION_METHODS:
+        return jsonify({"error": f"method must be one of: {', '.join(CORRELATION_METHODS)}"}), 400
 
+    columns, matrix = cached_correlation(get_clients_frame(), dataset=CLIENTS_DATASET, method=method)
+    matrix = np.nan_to_num(matrix, nan=0.0)
+    return jsonify({"columns": columns, "matrix": matrix.tolist(), "method": method})
 
-@analysis_bp.route("/anova", methods=["GET"])
-def anova_across_clusters():
-    df = load_dataset()
-    if "cluster_label" not in df.columns:
-        return jsonify({"error": "cluster_label not found in dataset"}), 400
 
-    numeric_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c != "cluster_label"]
-    groups = {int(k): v for k, v in df.groupby("cluster_label").groups.items()}
+@analysis_bp.route("/association", methods=["GET"])
+def association_matrix():
+    """Cramér's V / chi-square between categorical columns and eta for numeric x categorical."""
+    return jsonify(cached_association(get_clients_frame()))
 
-    results = []
-    for col in numeric_cols:
-        samples = [df.loc[idx_list, col].dropna().values for _, idx_list in groups.items()]
-        if len([s for s in samples if len(s) > 1]) < 2:
-            results.append({"feature": col, "f_stat": None, "p_value": None})
-            continue
-        f_stat, p_value = stats.f_oneway(*samples)
-        results.append({"feature": col, "f_stat": float(f_stat), "p_value": float(p_value)})
 
+@analysis_bp.route("/anova", methods=["GET"])
+def anova_across_clusters():
+    results = cached_anova(get_clients_frame())
+    if results is None:
+        return jsonify({"error": "cluster_label not found in dataset"}), 400
     return jsonify({"results": results})
 
 
 @analysis_bp.route("/feature-importance", methods=["POST"])
 def feature_importance():
-    df = load_dataset()
-    if "cluster_label" not in df.columns:
-        return jsonify({"error": "cluster_label not found in dataset"}), 400
-
-    drop_columns = ["cluster_label", "client_id"] if "client_id" in df.columns else ["cluster_label"]
-    X, feature_columns = prepare_features(df, drop_columns=drop_columns)
-    y = df["cluster_label"].astype(int).values
-
-    pipeline = build_numeric_preprocess_pipeline()
-    X_transformed = pipeline.fit_transform(X)
-
-    clf = RandomForestClassifier(n_estimators=200, random_state=42)
-    clf.fit(X_transformed, y)
-    importances = clf.feature_importances_.tolist()
-
-    return jsonify({"features": feature_columns, "importances": importances})
-
-
+    """
+    Start (or reuse) a background random-forest job. Returns the importances
+    directly when they are already stored for this data version and these
+    hyperparameters; otherwise 202 with a job id to poll.
+
+    Optional JSON body: n_estimators, max_depth, random_state, and for
+    approximate answers with confidence intervals sample_size, bootstraps,
+    time_budget (seconds) and confidence.
+    """
+    try:
+        params = normalize_params(request.get_json(silent=True))
+    except JobParamsError as e:
+        return jsonify({"error": str(e)}), 400
+
+    df = current_clients_frame()
+    source = [file_stamp(CSV_FALLBACK), get_data_version()]
+    if df is None:
+        # Database unreachable: results from the fallback must not answer for this version
+        df = get_clients_frame()
+        source.append("fallback")
+    key = job_key(source, params)
+    stored = load_result(key)
+    if stored is None:
+        if "cluster_label" not in df.columns:
+            return jsonify({"error": "cluster_label not found in dataset"}), 400
+        job = submit_job(lambda: df, source, params)
+    else:
+        job = {"job_id": key, "status": "done", "result": stored}
+    return _job_response(job)
+
+
+@analysis_bp.route("/feature-importance/jobs/<job_id>", methods=["GET"])
+def feature_importance_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    return _job_response(job)
+
+
+def _job_response(job):
+    body = {"job_id": job["job_id"], "status": job["status"]}
+    if job["status"] == "done":
+        body.update(job["result"])
+        return jsonify(body)
+    if job["status"] == "failed":
+        body["error"] = job.get("error")
+        return jsonify(body), 500
+    body["status_url"] = f"/api/analysis/feature-importance/jobs/{job['job_id']}"
+    return jsonify(body), 202
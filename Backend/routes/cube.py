@@ -0,0 +1,114 @@
+# routes/cube.py
+from flask import Blueprint, request
+from flask_cors import cross_origin
+
+from routes.graph_data import get_clients_frame, COLUMN_ALIASES
+from utils import ResponseTemplate, ErrorHandler
+from utils.cube import CubeError, CubeQuery, cached_cube
+from utils.data_version import get_data_version
+
+cube_bp = Blueprint("cube", __name__)
+
+
+def _canonical(column):
+    column = column.strip()
+    return COLUMN_ALIASES.get(column, column)
+
+
+def _split(value):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def _string_list(payload, name, default):
+    value = payload.get(name)
+    if value is None:
+        return default
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise CubeError(f"'{name}' must be a list of strings")
+    return value or default
+
+
+def _json_filters(payload):
+    raw = payload.get("filters")
+    if raw is None:
+        return {}
+    if not isinstance(raw, dict):
+        raise CubeError("'filters' must be an object mapping columns to lists of values")
+    filters = {}
+    for col, values in raw.items():
+        values = values if isinstance(values, list) else [values]
+        if not all(isinstance(v, (str, int, float)) for v in values):
+            raise CubeError(f"Filter values for '{col}' must be strings or numbers")
+        filters[col] = values
+    return filters
+
+
+def _parse_query():
+    """
+    Build a CubeQuery from either a JSON body:
+        {"dimensions": [...], "measures": [...], "filters": {"col": ["v1", "v2"]}}
+    or query parameters:
+        ?dimensions=a,b&measures=count,avg:balance&filter=Gender:Female&filter=Occupation:Student|Retired
+    """
+    payload = request.get_json(silent=True) if request.method == "POST" else None
+    if payload is not None and not isinstance(payload, dict):
+        raise CubeError("JSON body must be an object")
+    if payload:
+        dimensions = _string_list(payload, "dimensions", [])
+        measures = _string_list(payload, "measures", ["count"])
+        filters = _json_filters(payload)
+    else:
+        dimensions = _split(request.args.get("dimensions"))
+        measures = _split(request.args.get("measures")) or ["count"]
+        filters = {}
+        for item in request.args.getlist("filter"):
+            col, sep, values = item.partition(":")
+            if not sep:
+                raise CubeError(f"Filter must look like col:value1|value2, got '{item}'")
+            filters.setdefault(col, []).extend(v for v in values.split("|") if v != "")
+
+    measures = [
+        m if ":" not in m else f"{m.split(':', 1)[0]}:{_canonical(m.split(':', 1)[1])}"
+        for m in measures
+    ]
+    return CubeQuery(
+        [_canonical(d) for d in dimensions],
+        measures,
+        {_canonical(col): values for col, values in filters.items()},
+    )
+
+
+@cube_bp.route("/cube", methods=["GET", "POST"])
+@cross_origin(origins="http://localhost:5173")
+def cube():
+    """
+    Generic grouped aggregation over the cached client frame, e.g.
+    /api/cube?dimensions=Branch_Location,cluster_label&measures=count,avg:balance
+    /api/cube?dimensions=Occupation&measures=rate:Loan_Status=Approved
+    """
+    try:
+        query = _parse_query()
+    except CubeError as e:
+        return ResponseTemplate.validation_error(message=str(e), user_action="Check the cube dimensions, measures and filters")
+
+    try:
+        df = get_clients_frame()
+        if df.empty:
+            return ResponseTemplate.success(message="No client data available", data=[])
+
+        records, cached = cached_cube(df, query)
+        return ResponseTemplate.success(
+            message="Cube computed successfully",
+            data=records,
+            metadata={
+                "dimensions": list(query.dimensions),
+                "measures": [m.spec for m in query.measures],
+                "groups": len(records),
+                "data_version": get_data_version(),
+                "cached": cached,
+            },
+        )
+    except CubeError as e:
+        return ResponseTemplate.validation_error(message=str(e), user_action="Check the cube dimensions, measures and filters")
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "cube query")
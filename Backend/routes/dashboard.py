@@ -1,7 +1,15 @@
-from flask import Blueprint, jsonify, send_from_directory, current_app
+from flask import Blueprint, jsonify, send_from_directory, current_app, request
+from werkzeug.security import safe_join
 import os, json
+import logging
 import pandas as pd
 
+from routes.graph_data import get_clients_frame
+from utils.chart_renditions import RENDITION_FORMATS, RenditionError, RenditionPathError, rendition
+from utils.duckdb_engine import use_duckdb, query_frame, quote_ident
+
+logger = logging.getLogger(__name__)
+
 dashboard_bp = Blueprint("dashboard", __name__)
 
 # === CONFIG PATHS ===
@@ -14,47 +22,19 @@ CHARTS_DIR = os.path.join(BASE_DIR, "ML assets", "charts")
 def dashboard_overview():
     """Return summary statistics.
 
-    Prefer computing live from processed_clients.csv to reflect latest schema
-    (supports new headers like CIFs, Account_Balance, Transaction_Frequency, Cluster).
-    Fallback to summary_stats.json if CSV is missing.
+    Computed live from the shared clients frame (snapshot, database or the
+    processed_clients.csv fallback), which normalizes the exported headers.
+    Falls back to summary_stats.json when no client data is available.
     """
-    csv_path = os.path.join(DATA_DIR, "processed_clients.csv")
-    if os.path.exists(csv_path):
-        try:
-            df = pd.read_csv(csv_path)
-
-            # Normalize column names to expected keys
-            rename_map = {}
-            if "CIFs" in df.columns:
-                rename_map["CIFs"] = "client_id"
-            if "Age" in df.columns:
-                rename_map["Age"] = "age"
-            if "Account_Balance" in df.columns:
-                rename_map["Account_Balance"] = "balance"
-            if "Transaction_Frequency" in df.columns:
-                rename_map["Transaction_Frequency"] = "tx_count"
-            if "Cluster" in df.columns:
-                rename_map["Cluster"] = "cluster_label"
-
-            # Apply renames without dropping existing expected columns
-            if rename_map:
-                df = df.rename(columns=rename_map)
-
-            # Coerce numeric fields
-            if "balance" in df.columns:
-                df["balance"] = pd.to_numeric(df["balance"], errors="coerce").fillna(0.0)
-            if "tx_count" in df.columns:
-                df["tx_count"] = pd.to_numeric(df["tx_count"], errors="coerce").fillna(0)
-
-            total_clients = int(len(df))
-            segments_count = int(df["cluster_label"].nunique()) if "cluster_label" in df.columns else 0
-            avg_balance = float(df["balance"].mean()) if "balance" in df.columns else 0.0
-            total_assets = float(df["balance"].sum()) if "balance" in df.columns else 0.0
-            segment_breakdown = (
-                df["cluster_label"].value_counts().to_dict() if "cluster_label" in df.columns else {}
-            )
-
-            # Provide a simple timestamp using file mtime
+    try:
+        df = get_clients_frame()
+        if not df.empty:
+            balance = pd.to_numeric(df["balance"], errors="coerce").fillna(0.0) if "balance" in df.columns else None
+            counts = df["cluster_label"].value_counts() if "cluster_label" in df.columns else pd.Series(dtype=int)
+            counts = counts[counts > 0]  # Categoricals also count unused categories
+
+            # Timestamp of the last export, when there is one
+            csv_path = os.path.join(DATA_DIR, "processed_clients.csv")
             try:
                 mtime = os.path.getmtime(csv_path)
                 from datetime import datetime
@@ -63,16 +43,16 @@ def dashboard_overview():
                 export_timestamp = None
 
             return jsonify({
-                "total_clients": total_clients,
-                "segments_count": segments_count,
-                "avg_balance": avg_balance,
-                "total_assets": total_assets,
-                "segment_breakdown": segment_breakdown,
+                "total_clients": int(len(df)),
+                "segments_count": int(len(counts)),
+                "avg_balance": float(balance.mean()) if balance is not None else 0.0,
+                "total_assets": float(balance.sum()) if balance is not None else 0.0,
+                "segment_breakdown": {str(label): int(n) for label, n in counts.items()},
                 "export_timestamp": export_timestamp,
             })
-        except Exception as e:
-            # If anything goes wrong, fall back to summary_stats.json
-            pass
+    except Exception as e:
+        # If anything goes wrong, fall back to summary_stats.json
+        logger.error(f"Live overview failed, using summary_stats.json: {e}")
 
     # Fallback to precomputed summary file
     summary_path = os.path.join(DATA_DIR, "summary_stats.json")
@@ -86,30 +66,47 @@ def dashboard_overview():
 
 @dashboard_bp.route("/segments/distribution", methods=["GET"])
 def segments_distribution():
-    """Return per-cluster summary from processed_clients.csv"""
-    csv_path = os.path.join(DATA_DIR, "processed_clients.csv")
-
-    if not os.path.exists(csv_path):
-        return jsonify({"error": "Processed clients file not found"}), 404
-
-    df = pd.read_csv(csv_path)
-
-    # Generate cluster summary
-    cluster_summary = (
-        df.groupby("cluster_label")
-        .agg({
-            "balance": "mean",
-            "products_owned": "mean",
-            "risk_score": "mean"
-        })
-        .reset_index()
-        .rename(columns={
-            "cluster_label": "Cluster",
-            "balance": "Avg_Balance",
-            "products_owned": "Avg_Products",
-            "risk_score": "Avg_Risk_Score"
-        })
-    )
+    """
+    Return the per-cluster summary of the shared clients frame (snapshot,
+    database or CSV-only fallback), computed with pandas or, when
+    ANALYTICS_ENGINE=duckdb, with the embedded DuckDB engine.
+    """
+    df = get_clients_frame()
+    if df.empty:
+        return jsonify({"error": "No client data available"}), 404
+    if "cluster_label" not in df.columns:
+        return jsonify({"error": "cluster_label not found in dataset"}), 400
+
+    # Generate cluster summary over whichever measures this export has
+    measures = {
+        "balance": "Avg_Balance",
+        "products_owned": "Avg_Products",
+        "risk_score": "Avg_Risk_Score",
+    }
+    measures = {col: name for col, name in measures.items() if col in df.columns}
+
+    if use_duckdb():
+        select = ", ".join(
+            f"AVG(TRY_CAST({quote_ident(col)} AS DOUBLE)) AS {quote_ident(name)}"
+            for col, name in measures.items()
+        )
+        cluster_summary = query_frame(df, f"""
+            SELECT cluster_label AS "Cluster"{", " + select if select else ""}
+            FROM clients
+            WHERE cluster_label IS NOT NULL
+            GROUP BY cluster_label
+            ORDER BY cluster_label
+        """)
+    else:
+        numeric = pd.DataFrame({col: pd.to_numeric(df[col], errors="coerce") for col in measures})
+        numeric["cluster_label"] = df["cluster_label"]
+        cluster_summary = (
+            numeric.groupby("cluster_label", observed=True)
+            .agg({col: "mean" for col in measures} or {"cluster_label": "size"})
+            .drop(columns=["cluster_label"], errors="ignore")
+            .reset_index()
+            .rename(columns={"cluster_label": "Cluster", **measures})
+        )
 
     return jsonify({
         "total_clusters": len(cluster_summary),
@@ -119,8 +116,30 @@ def segments_distribution():
 
 @dashboard_bp.route("/charts/<path:filename>", methods=["GET"])
 def serve_chart(filename):
-    """Serve static chart images or HTML plots."""
-    if not os.path.exists(os.path.join(CHARTS_DIR, filename)):
+    """
+    Serve static chart images or HTML plots.
+
+    PNG charts accept ?size=thumb|tile|full and ?format=png|webp and are
+    served from renditions cached on disk by content hash. Charts are
+    redrawn by the background job queued whenever a clients data version
+    bump is committed (utils.chart_jobs).
+    """
+    path = safe_join(CHARTS_DIR, filename)
+    if path is None or not os.path.isfile(path):
         return jsonify({"error": f"Chart not found: {filename}"}), 404
 
-    return send_from_directory(CHARTS_DIR, filename)
+    size = request.args.get("size", "full").lower()
+    fmt = request.args.get("format", "png").lower()
+    try:
+        directory, name = rendition(CHARTS_DIR, filename, size, fmt)
+    except RenditionPathError:
+        return jsonify({"error": f"Chart not found: {filename}"}), 404
+    except RenditionError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.warning(f"Chart rendition failed for {filename}: {e}")
+        directory, name = CHARTS_DIR, filename
+
+    if name == filename:
+        return send_from_directory(directory, name)
+    return send_from_directory(directory, name, mimetype=RENDITION_FORMATS[fmt])
@@ -1,11 +1,29 @@
 # routes/graph_data.py
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from flask_cors import cross_origin
 from models import ClientRecord
 from models import db
 import os
+import json
+import logging
 from ml_loader import CSV_PATH as DEFAULT_DATASET_PATH
+from utils.data_version import VersionedCache, file_stamp, get_data_version
+from utils.dataset_snapshot import attach_snapshot, publish_snapshot, plain_copy
+from utils.circuit_breaker import db_breaker
+from utils.read_routing import analytics_read
+from utils.cube import warm_common_cuboids, cube_records, cached_cube, CubeQuery
+from utils.bitmap_index import get_bitmap_index
+from utils.search_index import get_search_index
+from utils.quantile_sketch import get_cluster_sketches
+from utils.downsample import DEFAULT_GRID, DEFAULT_POINTS, stratified_sample, viewport_budget
+from utils.histogram import HistogramError, column_values, histogram as compute_histogram, labelled_counts
+from utils.density import DensityError, cached_tiles, density_tiles, zoom_key
+from utils import ResponseTemplate, ErrorHandler
+import config
 import pandas as pd
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 graph_bp = Blueprint("graph_bp", __name__)
 
@@ -15,39 +33,218 @@ DATA_DIR = os.path.join(BASE_DIR, "ML assets", "processed_data")
 CSV_FALLBACK = DEFAULT_DATASET_PATH if os.path.exists(DEFAULT_DATASET_PATH) else os.path.join(DATA_DIR, "processed_clients.csv")
 
 
+# normalize common column names including new exported headers
+COLUMN_ALIASES = {
+    "products": "products_owned",
+    "Products": "products_owned",
+    "risk": "risk_score",
+    "Risk": "risk_score",
+    "CIFs": "client_id",
+    "Age": "age",
+    "Account_Balance": "balance",
+    "Transaction_Frequency": "tx_count",
+    "Cluster": "cluster_label",
+}
+
+_clients_cache = VersionedCache()
+# Derived payloads keyed by the frame they came from and request parameters;
+# kept apart so they never evict the frame
+_payload_cache = VersionedCache(max_entries=128)
+_fallback_cache = VersionedCache(max_entries=4)
+
+
+def get_clients_frame():
+    """
+    Return the shared, read-only clients frame for the current data version.
+
+    When snapshots are enabled the frame is a set of zero-copy views over the
+    memory-mapped snapshot that every worker attaches; the first worker to see
+    a new data version builds and publishes it. Text columns come back as
+    pandas Categoricals. Never mutate the result; use _load_clients_df().
+    """
+    source = _frame_source()
+    frame = _current_frame(source)
+    if frame is None:
+        # Database unreachable: serve a fallback, but never as this version's frame
+        return _fallback_frame(source)
+    return frame
+
+
+def current_clients_frame():
+    """
+    Like get_clients_frame(), but None instead of a fallback while the
+    database is unreachable, for callers that persist what they derive.
+    """
+    return _current_frame(_frame_source())
+
+
+def _current_frame(source):
+    frame = _clients_cache.get(("frame", source), lambda: _build_clients_frame(source))
+    if frame is None:
+        _clients_cache.discard(("frame", source))
+    return frame
+
+
+def _frame_source():
+    """Identity of the CSV fallback the frame may have been built from."""
+    return json.dumps(file_stamp(CSV_FALLBACK))
+
+
+def _build_clients_frame(source):
+    """
+    Frame for the current data version, or None when the database cannot be
+    read and no published snapshot holds this version.
+    """
+    snapshot = attach_snapshot() if config.USE_DATASET_SNAPSHOTS else None
+    version = get_data_version()
+    if snapshot is not None and snapshot.version == version and snapshot.source == source:
+        return snapshot.frame
+
+    df = _read_db_clients(version)
+    if df is None:
+        return None
+    if df.empty:
+        # CSV-only mode: the database is up but holds no clients
+        df = _read_csv_clients()
+    if not config.USE_DATASET_SNAPSHOTS:
+        return df
+
+    try:
+        snapshot = publish_snapshot(df, version, source=source)
+    except OSError as e:
+        logger.warning(f"Could not publish clients snapshot: {e}")
+        snapshot = None
+    return snapshot.frame if snapshot is not None else df
+
+
+def _fallback_frame(source):
+    """
+    Frame served while the database is unreachable: the last published
+    snapshot, else the CSV export. It is not published or cached as the
+    current version's frame, so the database read is retried once the
+    breaker lets it through.
+    """
+    snapshot = attach_snapshot() if config.USE_DATASET_SNAPSHOTS else None
+    if snapshot is not None:
+        return snapshot.frame
+    return _fallback_cache.get(("csv", source), _read_csv_clients)
+
+
+def refresh_clients_snapshot():
+    """
+    Publish a snapshot for the data version a writer just committed.
+
+    The new snapshot is built off to the side while readers keep serving the
+    previous one, then swapped in atomically via the snapshot pointer.
+    Common cube slices, the client search index and the per-cluster quantile
+    sketches are updated for the new version right away.
+    """
+    _clients_cache.clear()
+    _payload_cache.clear()
+    frame = get_clients_frame()
+    if not frame.empty:
+        warm_common_cuboids(frame)
+        get_search_index(frame)
+        get_cluster_sketches(frame)
+    return frame
+
+
 def _load_clients_df():
-    """Try database first; if empty or fails, fallback to processed CSV."""
+    """
+    Return a private, writable copy of the clients frame.
+
+    Categorical columns from the shared snapshot are decoded back to plain
+    values so existing callers see the same dtypes as a fresh read.
+    """
+    return plain_copy(get_clients_frame())
+
+
+def lookup_client(client_id):
+    """
+    Return one client's record from the shared frame via the hashed
+    client_id index, or None when the client is not in the current data.
+    """
+    df = get_clients_frame()
+    if df.empty:
+        return None
+    pos = get_search_index(df).position(client_id)
+    if pos is None:
+        return None
+    return cube_records(df.iloc[[pos]])[0]
+
+
+def _sketch_boxplot(column):
+    """
+    Per-cluster five-number summary of `column` from the quantile sketches
+    of the shared frame, or None if the column is not sketched.
+    """
+    frame = get_clients_frame()
+    if frame.empty or "cluster_label" not in frame.columns:
+        return None
+    sketches = get_cluster_sketches(frame)
+    if column not in sketches.columns:
+        return None
+    return sketches.boxplot(column)
+
+
+def _flatten_metadata(df):
+    """Expand the JSON client_metadata column into regular columns."""
+    if "client_metadata" not in df.columns:
+        return df
+
+    def _as_dict(value):
+        if isinstance(value, dict):
+            return value
+        if isinstance(value, str):
+            try:
+                parsed = json.loads(value)
+                return parsed if isinstance(parsed, dict) else {}
+            except ValueError:
+                return {}
+        return {}
+
+    meta = pd.DataFrame(df["client_metadata"].map(_as_dict).tolist(), index=df.index)
+    meta = meta.rename(columns=COLUMN_ALIASES)
+    meta = meta.loc[:, [c for c in meta.columns if c not in df.columns]]
+    meta = meta.loc[:, ~meta.columns.duplicated()]
+    return pd.concat([df.drop(columns=["client_metadata"]), meta], axis=1)
+
+
+def _read_db_clients(min_version=None):
+    """
+    Read the clients table (empty frame if it holds no rows), or return
+    None if the database is unreachable.
+
+    The read goes to the replica when it has caught up with `min_version`
+    and to the primary otherwise. It is guarded by the database circuit
+    breaker, so once that is open this returns immediately instead of
+    waiting out a connect timeout.
+    """
+    if not db_breaker.allow():
+        return None
     try:
-        engine = db.session.get_bind()
-        df = pd.read_sql_table("clients", con=engine)
-        if not df.empty:
-            return df
-    except Exception:
-        pass
+        df = analytics_read(lambda engine: pd.read_sql_table("clients", con=engine), min_version)
+        db_breaker.record_success()
+    except Exception as e:
+        db_breaker.record_failure()
+        logger.warning(f"Reading clients from the database failed: {e}")
+        return None
+    return _flatten_metadata(df) if not df.empty else df
 
-    # CSV fallback
+
+def _read_csv_clients():
+    """Read the processed CSV fallback with normalized column names."""
     try:
         if os.path.exists(CSV_FALLBACK):
             df = pd.read_csv(CSV_FALLBACK)
-            # normalize common column names including new exported headers
-            rename_map = {
-                "products": "products_owned",
-                "Products": "products_owned",
-                "risk": "risk_score",
-                "Risk": "risk_score",
-                "CIFs": "client_id",
-                "Age": "age",
-                "Account_Balance": "balance",
-                "Transaction_Frequency": "tx_count",
-                "Cluster": "cluster_label",
-            }
-            df = df.rename(columns=rename_map)
+            df = df.rename(columns=COLUMN_ALIASES)
             return df
     except Exception:
         pass
 
     return pd.DataFrame()
 
+
 @graph_bp.route("/graph-data", methods=["GET"])
 @cross_origin(origins="http://localhost:5173")
 def graph_data():
@@ -66,6 +263,145 @@ def graph_data():
         return jsonify([])
 
 
+EMPTY_SUMMARY = {
+    "balance_by_cluster": [],
+    "avg_balance_by_cluster": [],
+    "tx_distribution": [],
+    "age_boxplot": [],
+    "cluster_counts": [],
+    "scatter_points": []
+}
+
+
+def _first_column(df, candidates):
+    return next((c for c in candidates if c in df.columns), None)
+
+
+def _charts_summary_payload(df, budget=DEFAULT_POINTS, grid=DEFAULT_GRID):
+    """
+    Build every charts_summary panel from one read-only pass over `df`.
+
+    The cluster column is factorized once; counts, balance sums and means for
+    all clusters come from two bincounts over those codes, the histogram is a
+    single searchsorted/bincount and the boxplot is read from the quantile
+    sketches. Scatter points are a representative sample of `budget` points.
+    """
+    if df.empty:
+        return dict(EMPTY_SUMMARY)
+
+    cluster_col = _first_column(df, ["cluster_label", "cluster", "segment", "Cluster"])
+    balance_col = _first_column(df, ["balance", "Balance", "account_balance", "avg_balance"])
+    if balance_col is not None:
+        balance = pd.to_numeric(df[balance_col], errors="coerce").fillna(0.0)
+    else:
+        balance = pd.Series(0.0, index=df.index)
+    balance_values = balance.to_numpy(dtype=np.float64)
+
+    # Fused per-cluster reduction: count, sum and mean of balance
+    balance_by_cluster, avg_balance_by_cluster, cluster_counts = [], [], []
+    if cluster_col is not None:
+        codes, uniques = pd.factorize(df[cluster_col], use_na_sentinel=True)
+        labels = [u.item() if hasattr(u, "item") else u for u in uniques]
+        valid = codes >= 0
+        counts = np.bincount(codes[valid], minlength=len(labels))
+        sums = np.bincount(codes[valid], weights=balance_values[valid], minlength=len(labels))
+        integer_sums = pd.api.types.is_integer_dtype(balance.dtype)
+        for i in sorted(range(len(labels)), key=lambda i: (isinstance(labels[i], str), labels[i])):
+            total = int(round(sums[i])) if integer_sums else float(sums[i])
+            balance_by_cluster.append({"cluster": labels[i], "total_balance": total})
+            avg_balance_by_cluster.append({"cluster": labels[i], "avg_balance": float(sums[i] / counts[i])})
+            cluster_counts.append({"cluster": labels[i], "count": int(counts[i])})
+
+    # Histogram: prefer tx_count; fallback to products_owned; else to balance buckets
+    hist_source_col = None
+    for cand in ["tx_count", "products_owned", "transactions"]:
+        if cand in df.columns:
+            hist_source_col = cand
+            break
+    tx_distribution = []
+    if hist_source_col is not None or balance_col is not None:
+        # dynamic bins based on source; edges above the data maximum are dropped
+        if hist_source_col is None:
+            values = balance_values
+            edges = [0, 1000, 5000, 10000, 25000, 50000, 100000, np.inf]
+            bucket_labels = ["0-1k", "1k-5k", "5k-10k", "10k-25k", "25k-50k", "50k-100k", ">100k"]
+        else:
+            values = pd.to_numeric(df[hist_source_col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+            edges = [0, 1, 2, 3, 5, 10, 20, 50, 100, np.inf]
+            bucket_labels = ["0", "1", "2", "3-5", "6-10", "11-20", "21-50", "51-100", ">100"]
+        tx_distribution = labelled_counts(values, edges, bucket_labels, key="tx_bucket")
+
+    # Boxplot stats: prefer age; fallback to balance per cluster
+    box_source_col = "age" if "age" in df.columns else balance_col
+    age_boxplot = _sketch_boxplot(box_source_col) if box_source_col else []
+    if age_boxplot is None:
+        age_boxplot = _sorted_boxplot(df, cluster_col, box_source_col) if cluster_col else []
+
+    # Scatter points: balance vs risk_score, downsampled to the point budget
+    scatter_points = []
+    if balance_col is not None and cluster_col is not None and "risk_score" in df.columns:
+        scatter_points = _scatter_points(df, balance_col, "risk_score", cluster_col, budget, grid,
+                                         names=("balance", "risk_score"))
+
+    return {
+        "balance_by_cluster": balance_by_cluster,
+        "avg_balance_by_cluster": avg_balance_by_cluster,
+        "tx_distribution": tx_distribution,
+        "age_boxplot": age_boxplot,
+        "cluster_counts": cluster_counts,
+        "scatter_points": scatter_points
+    }
+
+
+def _scatter_points(df, x_col, y_col, cluster_col, budget, grid, names=None):
+    """
+    Records of a cluster-stratified, density-preserving sample of the
+    (x, y) points; rows with missing values are skipped.
+    """
+    x_name, y_name = names or (x_col, y_col)
+    x = pd.to_numeric(df[x_col], errors="coerce").to_numpy(dtype=np.float64)
+    y = pd.to_numeric(df[y_col], errors="coerce").to_numpy(dtype=np.float64)
+    codes, uniques = pd.factorize(df[cluster_col], use_na_sentinel=True)
+    rows = np.flatnonzero(~np.isnan(x) & ~np.isnan(y) & (codes >= 0))
+    keep = rows[stratified_sample(x[rows], y[rows], codes[rows], budget, grid)]
+    labels = np.asarray([u.item() if hasattr(u, "item") else u for u in uniques], dtype=object)
+    return [
+        {x_name: float(a), y_name: float(b), "cluster": c}
+        for a, b, c in zip(x[keep], y[keep], labels[codes[keep]])
+    ]
+
+
+def _viewport_args():
+    """Point budget and grid from ?points= or ?width=&height= (raises ValueError)."""
+    def _int(name):
+        value = request.args.get(name)
+        if value is None:
+            return None
+        number = int(value)
+        if number <= 0:
+            raise ValueError(name)
+        return number
+    return viewport_budget(width=_int("width"), height=_int("height"), points=_int("points"))
+
+
+def _sorted_boxplot(df, cluster_col, column):
+    """Exact five-number summaries per cluster from a single sort of the cluster codes."""
+    codes, uniques = pd.factorize(df[cluster_col], use_na_sentinel=True)
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    rows = []
+    for code, label in enumerate(uniques):
+        group = values[order[bounds[code]:bounds[code + 1]]]
+        group = group[~np.isnan(group)]
+        if len(group) == 0:
+            continue
+        low, q1, median, q3, high = np.quantile(group, [0.0, 0.25, 0.5, 0.75, 1.0])
+        rows.append({"cluster": label.item() if hasattr(label, "item") else label,
+                     "min": float(low), "q1": float(q1), "median": float(median), "q3": float(q3), "max": float(high)})
+    return sorted(rows, key=lambda r: (isinstance(r["cluster"], str), r["cluster"]))
+
+
 @graph_bp.route("/charts/summary", methods=["GET"])
 @cross_origin(origins="http://localhost:5173")
 def charts_summary():
@@ -74,121 +410,231 @@ def charts_summary():
     - balance_by_cluster: sum of balances per cluster
     - avg_balance_by_cluster: average balance per cluster
     - tx_distribution: histogram buckets of tx_count
-    - age_boxplot: five-number summary per cluster
+    - age_boxplot: five-number summary per cluster, from the cluster
+      quantile sketches (exact up to EXACT_LIMIT rows per cluster,
+      approximate beyond)
+
+    - scatter_points: representative sample sized by ?points= or the
+      client's ?width=&height= viewport (px)
+
+    The serialized payload is cached per data version and served frame,
+    so repeated dashboard refreshes are a cache read and a payload built
+    from the outage fallback is not served once the database is back.
     """
     try:
-        df = _load_clients_df()
+        budget, grid = _viewport_args()
+    except ValueError:
+        return jsonify({"error": "points, width and height must be positive integers"}), 400
+    try:
+        df = get_clients_frame()
+        body = _payload_cache.get_for(
+            df, ("summary", budget, grid),
+            lambda: current_app.json.dumps(_charts_summary_payload(df, budget, grid)),
+        )
+        return current_app.response_class(body, mimetype="application/json")
+    except Exception as e:
+        logger.warning(f"charts_summary failed: {e}")
+        return jsonify(EMPTY_SUMMARY)
+
+
+@graph_bp.route("/charts/scatter", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def charts_scatter():
+    """
+    Representative scatter sample of two numeric columns, e.g.
+    /api/charts/scatter?x=balance&y=Monthly_Income&width=800&height=600
+
+    The point budget follows ?points= or the viewport size, so the payload
+    stays fixed while the points still cover every cluster and region.
+    """
+    x_col = request.args.get("x", "balance")
+    y_col = request.args.get("y", "risk_score")
+    x_col, y_col = COLUMN_ALIASES.get(x_col, x_col), COLUMN_ALIASES.get(y_col, y_col)
+    try:
+        budget, grid = _viewport_args()
+    except ValueError:
+        return ResponseTemplate.validation_error(message="points, width and height must be positive integers")
+
+    try:
+        df = get_clients_frame()
         if df.empty:
-            return jsonify({
-                "balance_by_cluster": [],
-                "avg_balance_by_cluster": [],
-                "tx_distribution": [],
-                "age_boxplot": [],
-                "cluster_counts": [],
-                "scatter_points": []
-            })
-
-        # Ensure expected columns exist / coerce types
-        if "cluster_label" not in df.columns:
-            # try alternate names
-            for alt in ["cluster", "segment", "Cluster"]:
-                if alt in df.columns:
-                    df = df.rename(columns={alt: "cluster_label"})
-                    break
-        if "balance" not in df.columns:
-            # if there is a similarly named column
-            for alt in ["Balance", "account_balance", "avg_balance"]:
-                if alt in df.columns:
-                    df = df.rename(columns={alt: "balance"})
-                    break
-        df["balance"] = pd.to_numeric(df.get("balance", 0), errors="coerce").fillna(0.0)
+            return ResponseTemplate.success(message="No client data available", data=[])
+        missing = [c for c in (x_col, y_col, "cluster_label") if c not in df.columns]
+        if missing:
+            return ResponseTemplate.validation_error(message=f"Unknown column(s): {', '.join(missing)}")
 
-        balance_by_cluster = (
-            df.groupby("cluster_label")["balance"].sum().reset_index()
-            .rename(columns={"cluster_label": "cluster", "balance": "total_balance"})
-            .to_dict(orient="records")
+        points = _payload_cache.get_for(
+            df, ("scatter", x_col, y_col, budget, grid),
+            lambda: _scatter_points(df, x_col, y_col, "cluster_label", budget, grid),
         )
+        return ResponseTemplate.success(
+            message="Scatter sample computed",
+            data=points,
+            metadata={"x": x_col, "y": y_col, "total": int(len(df)), "points": len(points), "budget": budget},
+        )
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "scatter sample")
+
 
-        avg_balance_by_cluster = (
-            df.groupby("cluster_label")["balance"].mean().reset_index()
-            .rename(columns={"cluster_label": "cluster", "balance": "avg_balance"})
-            .to_dict(orient="records")
+@graph_bp.route("/charts/density", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def charts_density():
+    """
+    2D binned density of two numeric columns with the majority cluster per bin, e.g.
+    /api/charts/density?x=balance&y=Monthly_Income&shape=hex&nx=80&extent=0,50000,0,9000
+
+    `shape` is rect (default) or hex; `nx`/`ny` set the resolution and
+    `extent` (xmin,xmax,ymin,ymax) the zoomed viewport, defaulting to the
+    full data range. Tiles are cached per data version, served frame and
+    zoom level.
+    """
+    x_col = request.args.get("x", "balance")
+    y_col = request.args.get("y", "Monthly_Income")
+    x_col, y_col = COLUMN_ALIASES.get(x_col, x_col), COLUMN_ALIASES.get(y_col, y_col)
+    shape = request.args.get("shape", "rect").lower()
+    try:
+        nx = int(request.args.get("nx", 64))
+        ny = int(request.args["ny"]) if "ny" in request.args else None
+        extent = request.args.get("extent")
+        if extent is not None:
+            extent = [float(v) for v in extent.split(",")]
+            if len(extent) != 4:
+                raise ValueError
+        extent = zoom_key(extent)
+    except DensityError as e:
+        return ResponseTemplate.validation_error(message=str(e))
+    except ValueError:
+        return ResponseTemplate.validation_error(
+            message="nx and ny must be integers and extent must be xmin,xmax,ymin,ymax"
         )
 
-        # Histogram: prefer tx_count; fallback to products_owned; else to balance buckets
-        hist_source_col = None
-        for cand in ["tx_count", "products_owned", "transactions", "balance"]:
-            if cand in df.columns:
-                hist_source_col = cand
-                break
-        tx_distribution = []
-        if hist_source_col is not None:
-            series = pd.to_numeric(df[hist_source_col], errors="coerce").fillna(0)
-            # dynamic bins based on source
-            if hist_source_col == "balance":
-                bins = [0, 1000, 5000, 10000, 25000, 50000, 100000, series.max()]
-                labels = [
-                    "0-1k", "1k-5k", "5k-10k", "10k-25k", "25k-50k", "50k-100k", ">100k"
-                ]
+    try:
+        df = get_clients_frame()
+        if df.empty:
+            return ResponseTemplate.success(message="No client data available", data=None)
+
+        def _build():
+            x = column_values(df, x_col)
+            y = column_values(df, y_col)
+            if "cluster_label" in df.columns:
+                codes, uniques = pd.factorize(df["cluster_label"], use_na_sentinel=True)
+                labels = [u.item() if hasattr(u, "item") else u for u in uniques]
             else:
-                bins = [0, 1, 2, 3, 5, 10, 20, 50, 100, series.max()]
-                labels = ["0", "1", "2", "3-5", "6-10", "11-20", "21-50", "51-100", ">100"]
-            df["tx_bucket"] = pd.cut(series, bins=bins, labels=labels, right=True, include_lowest=True)
-            tx_distribution = (
-                df.groupby("tx_bucket").size().reset_index(name="count").to_dict(orient="records")
+                codes, labels = np.full(len(df), -1), []
+            return density_tiles(x, y, codes, labels, extent=extent, nx=nx, ny=ny, shape=shape)
+
+        tiles = cached_tiles(df, (x_col, y_col, shape, nx, ny, extent), _build)
+        return ResponseTemplate.success(message="Density tiles computed", data=tiles)
+    except (DensityError, HistogramError) as e:
+        return ResponseTemplate.validation_error(message=str(e))
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "density tiles")
+
+
+def _parse_quantiles(raw):
+    qs = [float(q) for q in raw.split(",") if q.strip() != ""]
+    if not qs or any(not 0.0 <= q <= 1.0 for q in qs):
+        raise ValueError
+    return qs
+
+
+@graph_bp.route("/charts/boxplot", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def charts_boxplot():
+    """Per-cluster five-number summary of ?column= (default age), from the quantile sketches."""
+    column = request.args.get("column", "age")
+    column = COLUMN_ALIASES.get(column, column)
+    try:
+        rows = _sketch_boxplot(column)
+        if rows is None:
+            return ResponseTemplate.validation_error(message=f"No numeric column '{column}' to summarise")
+        return ResponseTemplate.success(message="Boxplot computed", data=rows, metadata={"column": column})
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "boxplot")
+
+
+@graph_bp.route("/quantiles", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def quantiles():
+    """
+    Approximate quantiles of a numeric column, overall and per cluster, e.g.
+    /api/quantiles?column=balance&q=0.5,0.9,0.99
+
+    Answers come from mergeable KLL sketches: exact for small clusters, and
+    within about 1% of rank otherwise.
+    """
+    column = request.args.get("column", "")
+    column = COLUMN_ALIASES.get(column, column)
+    try:
+        qs = _parse_quantiles(request.args.get("q", "0.5"))
+    except ValueError:
+        return ResponseTemplate.validation_error(message="q must be a comma-separated list of numbers in [0, 1]")
+
+    try:
+        frame = get_clients_frame()
+        if frame.empty:
+            return ResponseTemplate.success(message="No client data available", data=[])
+        sketches = get_cluster_sketches(frame)
+        if column not in sketches.columns:
+            return ResponseTemplate.validation_error(
+                message=f"No numeric column '{column}'",
+                user_action=f"Use one of: {', '.join(sketches.columns)}",
             )
 
-        # Boxplot stats: prefer age; fallback to balance per cluster
-        box_source_col = "age" if "age" in df.columns else "balance"
-        age_boxplot = []
-        for cluster, sub in df.groupby("cluster_label"):
-            series = pd.to_numeric(sub[box_source_col], errors="coerce").dropna()
-            if len(series) == 0:
-                continue
-            stats = {
-                "cluster": cluster if pd.notna(cluster) else None,
-                "min": float(series.min()),
-                "q1": float(series.quantile(0.25)),
-                "median": float(series.quantile(0.5)),
-                "q3": float(series.quantile(0.75)),
-                "max": float(series.max()),
+        def _row(cluster, sketch):
+            return {
+                "cluster": cluster,
+                "count": sketch.n,
+                "exact": sketch.exact,
+                "quantiles": dict(zip((str(q) for q in qs), sketch.quantiles(qs))),
             }
-            age_boxplot.append(stats)
 
-        # Cluster counts (for pie chart)
-        cluster_counts = (
-            df.groupby("cluster_label").size().reset_index(name="count")
-            .rename(columns={"cluster_label": "cluster"})
-            .to_dict(orient="records")
+        overall = sketches.sketch(column)
+        per_cluster = [_row(c, sketches.sketch(column, c)) for c in sketches.clusters()
+                       if sketches.sketch(column, c) is not None]
+        return ResponseTemplate.success(
+            message="Quantiles computed",
+            data={"overall": _row(None, overall), "clusters": per_cluster},
+            metadata={"column": column, "q": qs},
         )
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "quantiles")
 
-        # Scatter points: balance vs risk_score (limit for performance)
-        scatter_cols = ["balance", "risk_score", "cluster_label"]
-        scatter_points = []
-        if all(c in df.columns for c in scatter_cols):
-            sc = df[scatter_cols].dropna().copy()
-            sc["balance"] = pd.to_numeric(sc["balance"], errors="coerce").fillna(0.0)
-            sc["risk_score"] = pd.to_numeric(sc["risk_score"], errors="coerce").fillna(0.0)
-            sc = sc.head(1000)
-            scatter_points = sc.rename(columns={"cluster_label": "cluster"}).to_dict(orient="records")
-
-        return jsonify({
-            "balance_by_cluster": balance_by_cluster,
-            "avg_balance_by_cluster": avg_balance_by_cluster,
-            "tx_distribution": tx_distribution,
-            "age_boxplot": age_boxplot,
-            "cluster_counts": cluster_counts,
-            "scatter_points": scatter_points
-        })
-    except Exception:
-        return jsonify({
-            "balance_by_cluster": [],
-            "avg_balance_by_cluster": [],
-            "tx_distribution": [],
-            "age_boxplot": [],
-            "cluster_counts": [],
-            "scatter_points": []
-        })
+
+@graph_bp.route("/histogram", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def histogram():
+    """
+    Histogram of a numeric column, e.g.
+    /api/histogram?column=balance&bins=30&scale=log&by=cluster_label
+
+    `bins` is a bin count or a comma-separated list of edges; `scale` is
+    linear (default), log or quantile; `by` splits counts per group.
+    """
+    column = request.args.get("column", "")
+    column = COLUMN_ALIASES.get(column, column)
+    by = request.args.get("by") or None
+    by = COLUMN_ALIASES.get(by, by) if by else None
+    scale = request.args.get("scale", "linear").lower()
+    raw_bins = request.args.get("bins", "20")
+    try:
+        if "," in raw_bins:
+            edges, bins = [float(e) for e in raw_bins.split(",") if e.strip() != ""], 20
+        else:
+            edges, bins = None, int(raw_bins)
+    except ValueError:
+        return ResponseTemplate.validation_error(message="bins must be an integer or a comma-separated list of edges")
+
+    try:
+        frame = get_clients_frame()
+        if frame.empty:
+            return ResponseTemplate.success(message="No client data available", data=None)
+        result = compute_histogram(frame, column, bins=bins, scale=scale, edges=edges, by=by)
+        return ResponseTemplate.success(message="Histogram computed", data=result)
+    except HistogramError as e:
+        return ResponseTemplate.validation_error(message=str(e))
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "histogram")
 
 
 @graph_bp.route("/clients/all", methods=["GET"])
@@ -224,3 +670,134 @@ def clients_all():
         return jsonify(records)
     except Exception:
         return jsonify([])
+
+
+@graph_bp.route("/clients", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def clients_filtered():
+    """
+    Drill down into clients by indexed attributes, e.g.
+    /api/clients?Gender=Female&Occupation=Student,Retired&mode=and&page=1&per_page=50
+
+    Values for the same attribute are OR-ed; attributes are combined with
+    `mode` (and|or). Filtering runs on bitmap indexes; only the requested
+    page of matching rows is materialised.
+    """
+    try:
+        mode = request.args.get("mode", "and").lower()
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", 50)), 1), 1000)
+    except ValueError:
+        return ResponseTemplate.validation_error(message="page and per_page must be integers")
+    if mode not in ("and", "or"):
+        return ResponseTemplate.validation_error(message="mode must be 'and' or 'or'")
+
+    try:
+        df = get_clients_frame()
+        if df.empty:
+            return ResponseTemplate.success(message="No client data available", data=[])
+
+        index = get_bitmap_index(df)
+        filters = {}
+        for key in request.args:
+            if key in ("mode", "page", "per_page"):
+                continue
+            col = COLUMN_ALIASES.get(key, key)
+            if not index.has_column(col):
+                return ResponseTemplate.validation_error(
+                    message=f"Cannot filter on '{key}'",
+                    user_action=f"Filter on one of: {', '.join(index.bitmaps)}",
+                )
+            values = [v for raw in request.args.getlist(key) for v in raw.split(",") if v != ""]
+            filters.setdefault(col, []).extend(values)
+
+        bitmap = index.select(filters, mode=mode)
+        rows = index.rows(bitmap)
+        start = (page - 1) * per_page
+        page_rows = df.iloc[rows[start:start + per_page]]
+
+        return ResponseTemplate.success(
+            message="Clients retrieved successfully",
+            data=cube_records(page_rows),
+            metadata={
+                "total": int(len(rows)),
+                "page": page,
+                "per_page": per_page,
+                "filters": filters,
+                "mode": mode,
+            },
+        )
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "filtered clients")
+
+
+@graph_bp.route("/clients/search", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def clients_search():
+    """
+    Search clients by CIF prefix and/or occupation and branch keywords, e.g.
+    /api/clients/search?q=CIF10&text=teacher harare&page=1&per_page=20
+
+    `q` matches the start of client_id; every word in `text` must appear in
+    the client's Occupation or Branch_Location. Results are ordered by
+    client_id.
+    """
+    prefix = request.args.get("q", "").strip()
+    text = request.args.get("text", "").strip()
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", 20)), 1), 200)
+    except ValueError:
+        return ResponseTemplate.validation_error(message="page and per_page must be integers")
+    if not prefix and not text:
+        return ResponseTemplate.validation_error(
+            message="Provide a search term",
+            user_action="Pass q (client ID prefix) and/or text (occupation or branch keywords)",
+        )
+
+    try:
+        df = get_clients_frame()
+        if df.empty:
+            return ResponseTemplate.success(message="No client data available", data=[])
+
+        rows, total = get_search_index(df).search(prefix, text, page=page, per_page=per_page)
+        return ResponseTemplate.success(
+            message="Search completed",
+            data=cube_records(df.iloc[rows]),
+            metadata={
+                "total": int(total),
+                "page": page,
+                "per_page": per_page,
+                "q": prefix,
+                "text": text,
+            },
+        )
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "client search")
+
+
+@graph_bp.route("/clients/<client_id>/profile", methods=["GET"])
+@cross_origin(origins="http://localhost:5173")
+def client_profile(client_id):
+    """
+    Full profile for one client plus a summary of its cluster, served from
+    the in-memory client frame without a database round trip.
+    """
+    try:
+        record = lookup_client(client_id)
+        if record is None:
+            return ResponseTemplate.not_found_error(message=f"Client {client_id} not found")
+
+        cluster = None
+        if record.get("cluster_label") is not None:
+            df = get_clients_frame()
+            measures = ["count"] + [f"avg:{c}" for c in ("age", "balance", "tx_count") if c in df.columns]
+            groups, _ = cached_cube(df, CubeQuery(["cluster_label"], measures))
+            cluster = next((g for g in groups if g["cluster_label"] == record["cluster_label"]), None)
+
+        return ResponseTemplate.success(
+            message="Client profile retrieved successfully",
+            data={"client": record, "cluster": cluster},
+        )
+    except Exception as e:
+        return ErrorHandler.handle_exception(e, "client profile")
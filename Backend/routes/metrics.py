@@ -0,0 +1,37 @@
+# routes/metrics.py
+from flask import Blueprint, jsonify, request, Response
+
+from models import db
+from utils.db_pool import pool_metrics, prometheus_lines
+from utils.circuit_breaker import db_breaker
+from utils.read_routing import replica_engine, replica_breaker
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/db-pool", methods=["GET"])
+def db_pool_metrics():
+    """
+    Connection pool occupancy and checkout wait histogram.
+    Pass ?format=prometheus for the Prometheus text exposition format.
+    """
+    pools = {"primary": pool_metrics(db.engine)}
+    replica = replica_engine()
+    if replica is not None:
+        pools["replica"] = pool_metrics(replica)
+
+    if request.args.get("format") == "prometheus":
+        lines = []
+        for name, metrics in pools.items():
+            lines.extend(prometheus_lines(name, metrics))
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+    return jsonify(pools)
+
+
+@metrics_bp.route("/db-breaker", methods=["GET"])
+def db_breaker_state():
+    """State of the circuit breakers guarding analytics reads."""
+    breakers = {"primary": db_breaker.snapshot()}
+    if replica_engine() is not None:
+        breakers["replica"] = replica_breaker.snapshot()
+    return jsonify(breakers)
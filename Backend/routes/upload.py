@@ -3,6 +3,8 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 import pandas as pd
 from models import db, ClientRecord
+from utils.data_version import bump_data_version
+from routes.graph_data import refresh_clients_snapshot
 
 upload_bp = Blueprint("upload_bp", __name__)
 
@@ -63,4 +65,12 @@ def upload_csv():
                 )
                 db.session.add(new_rec)
 
+        bump_data_version()
+
+    # Readers kept the previous snapshot during the transaction; swap in the new one
+    try:
+        refresh_clients_snapshot()
+    except Exception as e:
+        print("Snapshot refresh failed:", e)
+
     return jsonify({"message": "CSV uploaded and data inserted/updated successfully."}), 200
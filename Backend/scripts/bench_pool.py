@@ -0,0 +1,107 @@
+"""
+Throughput benchmark for different connection pool sizes.
+
+Runs N worker threads that each check out a connection, run a small query
+against the clients table and return it, for a fixed duration per pool size.
+
+    python scripts/bench_pool.py --sizes 1 2 5 10 20 --threads 32 --seconds 5
+
+Uses BENCH_DATABASE_URL / DATABASE_URL when set, otherwise a throwaway SQLite
+file seeded with synthetic clients.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.db_pool import InstrumentedQueuePool  # noqa: E402
+
+
+def _seed_sqlite(url: str, rows: int) -> None:
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS clients ("
+            "id INTEGER PRIMARY KEY, client_id VARCHAR(128), age INTEGER, "
+            "balance FLOAT, tx_count INTEGER, cluster_label INTEGER)"
+        ))
+        if conn.execute(text("SELECT COUNT(*) FROM clients")).scalar() == 0:
+            conn.execute(
+                text("INSERT INTO clients (client_id, age, balance, tx_count, cluster_label) "
+                     "VALUES (:c, :a, :b, :t, :k)"),
+                [{"c": str(i), "a": 20 + i % 50, "b": float(i * 13 % 50000), "t": i % 90, "k": i % 4}
+                 for i in range(rows)],
+            )
+    engine.dispose()
+
+
+def run(url: str, pool_size: int, threads: int, seconds: float, max_overflow: int) -> dict:
+    engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=30,
+        pool_pre_ping=True,
+    )
+    query = text("SELECT cluster_label, COUNT(*), AVG(balance) FROM clients GROUP BY cluster_label")
+    done = [0] * threads
+    stop_at = time.perf_counter() + seconds
+
+    def worker(i: int) -> None:
+        while time.perf_counter() < stop_at:
+            with engine.connect() as conn:
+                conn.execute(query).fetchall()
+            done[i] += 1
+
+    pool_threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool_threads:
+        t.start()
+    for t in pool_threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    stats = engine.pool.stats.snapshot()
+    engine.dispose()
+    return {
+        "pool_size": pool_size,
+        "queries": sum(done),
+        "qps": sum(done) / elapsed,
+        "wait_avg_ms": stats["wait_avg_ms"],
+        "wait_max_ms": stats["wait_max_ms"],
+        "timeouts": stats["timeouts"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=20000, help="rows to seed into the SQLite fallback")
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL") or os.environ.get("DATABASE_URL")
+    if not url:
+        path = os.path.join(tempfile.gettempdir(), "clientsphere_bench_pool.db")
+        url = f"sqlite:///{path}"
+        _seed_sqlite(url, args.rows)
+
+    print(f"Benchmarking {url} with {args.threads} threads, {args.seconds}s per pool size")
+    print(f"{'pool':>6} {'queries':>9} {'qps':>10} {'wait avg ms':>12} {'wait max ms':>12} {'timeouts':>9}")
+    for size in args.sizes:
+        r = run(url, size, args.threads, args.seconds, args.max_overflow)
+        print(f"{r['pool_size']:>6} {r['queries']:>9} {r['qps']:>10.1f} "
+              f"{r['wait_avg_ms']:>12.2f} {r['wait_max_ms']:>12.2f} {r['timeouts']:>9}")
+
+
+if __name__ == "__main__":
+    main()
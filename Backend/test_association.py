@@ -0,0 +1,36 @@
+"""
+Test Cramér's V / chi-square against scipy and eta against a hand computation.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.association import association_matrix
+
+
+def test_cramers_v_matches_chi2_contingency():
+    """Chi-square, dof, p and V equal scipy's uncorrected test; missing pairs are dropped."""
+    rng = np.random.default_rng(0)
+    region = rng.choice(["north", "south", "east"], 500)
+    # Tier depends on region for 60% of clients, so V sits well between 0 and 1
+    linked = np.where(region == "north", "gold", "silver")
+    tier = np.where(rng.random(500) < 0.6, linked, rng.choice(["gold", "silver", "bronze"], 500))
+    df = pd.DataFrame({"region": region, "tier": tier})
+    df.loc[::11, "tier"] = None
+
+    result = association_matrix(df)
+    test = result["chi_square"][0]
+    table = pd.crosstab(df["region"], df["tier"]).to_numpy()
+    chi2, p, dof, _ = stats.chi2_contingency(table, correction=False)
+    assert np.isclose(test["chi2"], chi2) and np.isclose(test["p_value"], p) and test["dof"] == dof, test
+    expected_v = np.sqrt(chi2 / table.sum() / (min(table.shape) - 1))
+    assert np.isclose(result["cramers_v"][0][1], expected_v) and result["cramers_v"][1][0] == result["cramers_v"][0][1]
+
+
+def test_correlation_ratio_by_hand():
+    """eta = sqrt(SS_between / SS_total): here 13.5 / 17.5."""
+    df = pd.DataFrame({"segment": ["a", "a", "a", "b", "b", "b"], "balance": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]})
+    result = association_matrix(df)
+    assert result["categorical"] == ["segment"] and result["numeric"] == ["balance"]
+    assert np.isclose(result["correlation_ratio"][0][0], np.sqrt(13.5 / 17.5))
@@ -0,0 +1,57 @@
+"""
+Test bitmap-index filters against the unindexed filter path.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.bitmap_index import BitmapIndex, get_bitmap_index
+from utils.cube import match_values
+
+
+def _frame():
+    return pd.DataFrame({
+        "Gender": ["Female", "Male", "Female", "Male", None],
+        "Occupation": pd.Categorical(["Student", "Retired", "Teacher", "Student", "Retired"]),
+        "cluster_label": [1.0, 2.0, 1.0, np.nan, 2.5],
+    })
+
+
+def _indexed(df, col, values):
+    index = BitmapIndex(df)
+    return index.mask(index.lookup(col, values))
+
+
+def test_select_matches_pandas():
+    """AND/OR combinations match the equivalent pandas boolean masks."""
+    df = _frame()
+    index = get_bitmap_index(df)
+    female = df["Gender"] == "Female"
+    student_or_retired = df["Occupation"].isin(["Student", "Retired"])
+
+    both = index.select({"Gender": ["Female"], "Occupation": ["Student", "Retired"]})
+    assert index.rows(both).tolist() == np.flatnonzero(female & student_or_retired).tolist()
+    either = index.select({"Gender": ["Female"], "Occupation": ["Student", "Retired"]}, mode="or")
+    assert index.count(either) == int((female | student_or_retired).sum())
+    assert get_bitmap_index(df) is index
+
+
+def test_indexed_and_unindexed_paths_agree():
+    """Numeric filter values match by value on both paths (1 == 1.0 == "1")."""
+    df = _frame()
+    for col, values in [
+        ("cluster_label", ["1"]),
+        ("cluster_label", ["1.0"]),
+        ("cluster_label", [1]),
+        ("cluster_label", ["2.5", "nan", "gold"]),
+        ("Gender", ["Female", "None"]),
+        ("Occupation", ["Student"]),
+    ]:
+        expected = match_values(df[col], values)
+        assert _indexed(df, col, values).tolist() == expected.tolist(), (col, values)
+
+    assert match_values(df["cluster_label"], ["1"]).tolist() == [True, False, True, False, False]
+    ints = df.assign(cluster_label=[1, 2, 1, 3, 2])
+    assert _indexed(ints, "cluster_label", ["1.0"]).tolist() == match_values(ints["cluster_label"], ["1.0"]).tolist()
+    assert match_values(ints["cluster_label"], ["1.0"]).sum() == 2
+
@@ -0,0 +1,63 @@
+"""
+Test incremental chart regeneration: only charts whose inputs changed are
+re-rendered.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import routes.generate_charts as generate_charts
+from models import db
+from utils.chart_jobs import chart_paths, load_manifest, regenerate
+from utils.data_version import bump_data_version
+
+
+def _frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "cluster_label": rng.choice(["gold", "silver", "bronze"], n),
+        "balance": rng.normal(1000, 200, n),
+        "Monthly_Income": rng.normal(500, 50, n),
+        "tx_count": rng.integers(0, 50, n),
+    })
+
+
+def test_regenerate_is_incremental(tmp_path, override_config):
+    """Unchanged inputs are skipped; a forced run or new data re-renders."""
+    override_config(CHART_RENDER_WORKERS=0)
+    charts_dir = str(tmp_path)
+
+    report = regenerate(_frame(), data_version=1, charts_dir=charts_dir)
+    assert report and all(r["status"] == "rendered" for r in report.values()), report
+    assert load_manifest(charts_dir)["data_version"] == 1
+    assert all(os.path.exists(path) for path in chart_paths(charts_dir).values())
+
+    report = regenerate(_frame(), data_version=2, charts_dir=charts_dir)
+    assert all(r["status"] == "unchanged" for r in report.values()), report
+
+    report = regenerate(_frame(), data_version=2, force=True, charts_dir=charts_dir)
+    assert all(r["status"] == "rendered" for r in report.values()), report
+
+    changed = _frame()
+    changed.loc[0, "balance"] += 1.0
+    report = regenerate(changed, data_version=3, charts_dir=charts_dir)
+    assert report["balance_bar"]["status"] == "rendered"
+    assert report["segment_pie"]["status"] == "unchanged"
+
+
+def test_committed_bump_schedules_regeneration(sqlite_app, override_config, monkeypatch):
+    """Any committed clients version bump queues a regeneration, not only uploads."""
+    override_config(CHARTS_REGENERATE_ON_WRITE=True)
+    scheduled = []
+    monkeypatch.setattr(generate_charts, "schedule_chart_regeneration", lambda: scheduled.append(True))
+    with sqlite_app.app_context():
+        bump_data_version()
+        assert scheduled == []
+        db.session.commit()
+        assert scheduled == [True]
+
+        bump_data_version("other")
+        db.session.commit()
+        assert scheduled == [True]
@@ -0,0 +1,74 @@
+"""
+Test chart renditions and chart path handling in serve_chart.
+
+Uses a temporary charts directory with a sibling "outside" directory, so a
+traversal that escaped the charts directory would be observable on disk.
+"""
+
+import os
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+import pytest
+
+import routes.dashboard as dashboard
+from utils.chart_renditions import RenditionPathError, rendition
+
+
+def _png(path, width_in=8):
+    plt.figure(figsize=(width_in, 4))
+    plt.plot([0, 1], [0, 1])
+    plt.savefig(path)
+    plt.close()
+
+
+@pytest.fixture
+def charts(tmp_path):
+    """(charts_dir, outside_dir), each holding one PNG."""
+    charts_dir, outside_dir = tmp_path / "charts", tmp_path / "outside"
+    charts_dir.mkdir()
+    outside_dir.mkdir()
+    _png(charts_dir / "chart.png")
+    _png(outside_dir / "secret.png")
+    return str(charts_dir), str(outside_dir)
+
+
+def test_renditions(charts):
+    """Thumbnails are resized, cached by content hash and replaced on redraw."""
+    charts_dir, _ = charts
+    directory, name = rendition(charts_dir, "chart.png", "thumb", "webp")
+    assert name.endswith(".thumb.webp"), name
+    first = os.path.join(directory, name)
+    assert os.path.exists(first)
+
+    # Same content: served from disk without rewriting
+    mtime = os.stat(first).st_mtime_ns
+    assert rendition(charts_dir, "chart.png", "thumb", "webp") == (directory, name)
+    assert os.stat(first).st_mtime_ns == mtime
+
+    # Redrawn chart: new hash, stale rendition removed
+    _png(os.path.join(charts_dir, "chart.png"), width_in=6)
+    _, renamed = rendition(charts_dir, "chart.png", "thumb", "webp")
+    assert renamed != name and not os.path.exists(first)
+
+
+def test_path_traversal(charts, sqlite_app, override_config, monkeypatch):
+    """Encoded '..' paths are refused and nothing is written outside the charts dir."""
+    charts_dir, outside_dir = charts
+    override_config(USE_DATASET_SNAPSHOTS=False)
+    with pytest.raises(RenditionPathError):
+        rendition(charts_dir, "../outside/secret.png", "thumb", "png")
+
+    monkeypatch.setattr(dashboard, "CHARTS_DIR", charts_dir)
+    client = sqlite_app.test_client()
+    for url in ["/api/charts/%2e%2e/outside/secret.png?size=thumb",
+                "/api/charts/%2e%2e/%2e%2e/%2e%2e/outside/secret.png",
+                "/api/charts/..%2foutside%2fsecret.png?size=tile&format=webp"]:
+        response = client.get(url)
+        assert response.status_code == 404, (url, response.status_code)
+    assert os.listdir(outside_dir) == ["secret.png"], os.listdir(outside_dir)
+
+    response = client.get("/api/charts/chart.png?size=thumb")
+    assert response.status_code == 200 and response.mimetype == "image/png"
@@ -0,0 +1,36 @@
+"""
+Test /clients/<id>/profile for a known and an unknown client.
+"""
+
+import pytest
+
+from models import db, ClientRecord
+
+
+@pytest.fixture
+def client(sqlite_app, override_config):
+    """Test client over P0..P3: balances 0-300, clusters alternating 0 and 1."""
+    override_config(USE_DATASET_SNAPSHOTS=False)
+    with sqlite_app.app_context():
+        for i in range(4):
+            db.session.add(ClientRecord(client_id=f"P{i}", age=30 + i, balance=100.0 * i, tx_count=i, cluster_label=i % 2))
+        db.session.commit()
+    return sqlite_app.test_client()
+
+
+def test_known_client(client):
+    """The record comes back with its cluster's count and averages."""
+    response = client.get("/api/clients/P3/profile")
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert data["client"]["client_id"] == "P3" and data["client"]["balance"] == 300.0, data
+    cluster = data["cluster"]
+    assert cluster["cluster_label"] == 1 and cluster["count"] == 2, cluster
+    assert cluster["avg:balance"] == 200.0 and cluster["avg:age"] == 32.0, cluster
+
+
+def test_unknown_client(client):
+    """An id missing from the index is a 404 naming the id."""
+    response = client.get("/api/clients/nobody/profile")
+    assert response.status_code == 404
+    assert "nobody" in response.get_json()["message"]
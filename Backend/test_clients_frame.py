@@ -0,0 +1,108 @@
+"""
+Test the shared clients frame across a database outage.
+
+While the database is unreachable the frame falls back to the CSV export;
+that fallback must never be published or cached as the current version's
+frame, so the database rows come back as soon as it recovers, even at the
+same data version.
+"""
+
+import pandas as pd
+import pytest
+
+import routes.graph_data as graph_data
+from models import db, ClientRecord
+from utils.circuit_breaker import db_breaker
+from utils.dataset_snapshot import attach_snapshot
+
+CSV_IDS = [f"csv-{i}" for i in range(4)]
+DB_IDS = [f"db-{i}" for i in range(4)]
+
+
+def _unreachable(*args, **kwargs):
+    raise ConnectionError("database is down")
+
+
+@pytest.fixture
+def outage(sqlite_app, tmp_path, override_config, monkeypatch):
+    """
+    Clients db-0..db-3 (balances 5-8, cluster 2) in the database and
+    csv-0..csv-3 (balances 10-13, cluster 1) in the CSV export. outage(True)
+    makes analytics reads fail; outage(False) restores them. The data
+    version stays 0 throughout.
+    """
+    override_config(USE_DATASET_SNAPSHOTS=True)
+    csv_path = tmp_path / "clients.csv"
+    pd.DataFrame({
+        "CIFs": [f"csv-{i}" for i in range(4)], "Age": [40] * 4,
+        "Account_Balance": [10.0 + i for i in range(4)], "Cluster": [1] * 4,
+    }).to_csv(csv_path, index=False)
+    monkeypatch.setattr(graph_data, "CSV_FALLBACK", str(csv_path))
+    with sqlite_app.app_context():
+        for i in range(4):
+            db.session.add(ClientRecord(client_id=f"db-{i}", age=30, balance=5.0 + i, tx_count=1, cluster_label=2))
+        db.session.commit()
+
+    read = graph_data.analytics_read
+
+    def _set(down):
+        monkeypatch.setattr(graph_data, "analytics_read", _unreachable if down else read)
+        db_breaker.record_success()
+    return _set
+
+
+def test_db_down_then_recover(sqlite_app, outage):
+    """CSV fallback is served during an outage and replaced by DB rows after it."""
+    with sqlite_app.app_context():
+        outage(True)
+        frame = graph_data.get_clients_frame()
+        assert frame["client_id"].astype(str).tolist() == CSV_IDS, frame
+        assert attach_snapshot() is None, "CSV fallback was published as a snapshot"
+
+        outage(False)
+        frame = graph_data.get_clients_frame()
+        assert frame["client_id"].astype(str).tolist() == DB_IDS, frame
+        snapshot = attach_snapshot()
+        assert snapshot is not None and snapshot.frame["client_id"].astype(str).tolist() == DB_IDS
+
+
+def test_summary_recovers_after_outage(sqlite_app, outage):
+    """Summary and scatter payloads built from the fallback are not served after recovery."""
+    client = sqlite_app.test_client()
+    outage(True)
+    assert client.get("/api/charts/summary").get_json()["balance_by_cluster"] == [{"cluster": 1, "total_balance": 46.0}]
+    scatter = client.get("/api/charts/scatter?y=age").get_json()["data"]
+    assert sorted(p["balance"] for p in scatter) == [10.0, 11.0, 12.0, 13.0], scatter
+
+    outage(False)
+    assert client.get("/api/charts/summary").get_json()["balance_by_cluster"] == [{"cluster": 2, "total_balance": 26.0}]
+    scatter = client.get("/api/charts/scatter?y=age").get_json()["data"]
+    assert sorted(p["balance"] for p in scatter) == [5.0, 6.0, 7.0, 8.0], scatter
+
+
+def test_density_recovers_after_outage(sqlite_app, outage):
+    """Density tiles built from the fallback are not served after recovery."""
+    client = sqlite_app.test_client()
+    outage(True)
+    assert round(client.get("/api/charts/density?y=age").get_json()["data"]["x"][0]) == 10
+    outage(False)
+    assert round(client.get("/api/charts/density?y=age").get_json()["data"]["x"][0]) == 5
+
+
+def test_density_rejects_non_finite_extent(sqlite_app):
+    """inf/nan extents are a 400, never serialized as Infinity."""
+    client = sqlite_app.test_client()
+    for extent in ("0,inf,0,1", "nan,1,0,1", "0,1,-inf,1"):
+        response = client.get(f"/api/charts/density?extent={extent}")
+        assert response.status_code == 400, (extent, response.status_code)
+
+
+def test_figures_recover_after_outage(sqlite_app, outage):
+    """Figure specs built from the fallback are not served after recovery."""
+    client = sqlite_app.test_client()
+    outage(True)
+    during = client.get("/api/charts/figures/interactive_scatter")
+    assert during.status_code == 200
+    outage(False)
+    after = client.get("/api/charts/figures/interactive_scatter")
+    assert after.status_code == 200 and after.data != during.data
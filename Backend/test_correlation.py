@@ -0,0 +1,45 @@
+"""
+Test incremental correlation accumulators against pandas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.correlation import MomentAccumulator, cached_correlation, pearson_accumulator, row_diff
+
+
+def _frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "age": rng.integers(18, 80, rows).astype(float),
+        "balance": rng.lognormal(8, 1, rows) + 1e6,
+        "tx_count": rng.poisson(20, rows).astype(float),
+    })
+    df["score"] = df["balance"] * 0.001 + rng.normal(0, 5, rows)
+    df.loc[rng.choice(rows, rows // 10, replace=False), "tx_count"] = np.nan
+    return df
+
+
+def test_matches_pandas():
+    """Full build equals pandas pairwise-complete Pearson and Spearman."""
+    df = _frame(2000, seed=1)
+    corr = MomentAccumulator.from_values(list(df.columns), df.to_numpy()).correlation()
+    assert np.allclose(corr, df.corr().to_numpy(), atol=1e-9)
+
+    _, spearman = cached_correlation(df, "test-spearman", method="spearman")
+    assert np.allclose(spearman, df.rank().corr().to_numpy(), atol=1e-9)
+
+
+def test_incremental_update():
+    """Appending and deleting rows patches the previous accumulator."""
+    base = _frame(1000, seed=2)
+    pearson_accumulator("test-incremental", base)
+
+    grown = pd.concat([base.iloc[50:], _frame(100, seed=3)], ignore_index=True)
+    added, removed = row_diff(pd.util.hash_pandas_object(base, index=False).to_numpy(),
+                              pd.util.hash_pandas_object(grown, index=False).to_numpy())
+    assert (len(added), len(removed)) == (100, 50)
+
+    corr = pearson_accumulator("test-incremental", grown).correlation()
+    assert np.allclose(corr, grown.corr().to_numpy(), atol=1e-9)
+
@@ -0,0 +1,58 @@
+"""
+Test the aggregation cube and its per-frame result cache.
+"""
+
+import pandas as pd
+
+from utils.cube import CubeQuery, cached_cube
+
+
+def _frame(balances):
+    return pd.DataFrame({
+        "cluster_label": [1, 1, 2, 2][:len(balances)],
+        "balance": balances,
+    })
+
+
+def test_cube_matches_pandas():
+    """Grouped counts and averages match pandas."""
+    df = _frame([10.0, 30.0, 5.0, 7.0])
+    records, cached = cached_cube(df, CubeQuery(["cluster_label"], ["count", "avg:balance"]))
+    expected = df.groupby("cluster_label")["balance"].agg(["count", "mean"]).reset_index()
+    assert [r["cluster_label"] for r in records] == expected["cluster_label"].tolist()
+    assert [r["count"] for r in records] == expected["count"].tolist()
+    assert [r["avg:balance"] for r in records] == expected["mean"].tolist()
+    assert not cached
+
+    _, cached = cached_cube(df, CubeQuery(["cluster_label"], ["count", "avg:balance"]))
+    assert cached
+
+
+def test_rebuilt_frame_is_not_served_stale():
+    """A new frame at the same data version (e.g. changed CSV) is recomputed."""
+    query = CubeQuery(["cluster_label"], ["sum:balance"])
+    old = _frame([1.0, 1.0, 1.0, 1.0])
+    first, _ = cached_cube(old, query)
+    del old
+
+    new = _frame([100.0, 100.0, 100.0, 100.0])
+    second, cached = cached_cube(new, query)
+    assert not cached
+    assert [r["sum:balance"] for r in first] == [2.0, 2.0]
+    assert [r["sum:balance"] for r in second] == [200.0, 200.0]
+
+
+
+def test_rejects_malformed_json_body(sqlite_app):
+    """Wrongly typed dimensions, measures or filters are a 400, not a 500."""
+    client = sqlite_app.test_client()
+    for body in (
+        {"dimensions": "cluster_label"},
+        {"dimensions": ["cluster_label", 3]},
+        {"measures": "count"},
+        {"filters": ["Gender"]},
+        {"filters": {"Gender": [{"value": "Female"}]}},
+        ["cluster_label"],
+    ):
+        response = client.post("/api/cube", json=body)
+        assert response.status_code == 400, (body, response.status_code)
@@ -0,0 +1,72 @@
+"""
+Test that versioned caches are invalidated when the data version moves,
+both by a local write path and by a write committed in another worker.
+"""
+
+from models import db, DataVersion
+from utils import data_version
+from utils.data_version import VersionedCache, bump_data_version, get_data_version, on_version_committed
+
+
+def test_version_bump_invalidates_cache(sqlite_app):
+    """A bump (local or from another worker) forces the next get to rebuild."""
+    with sqlite_app.app_context():
+        cache = VersionedCache(max_entries=4)
+        builds = []
+
+        def _build():
+            builds.append(get_data_version())
+            return len(builds)
+
+        assert cache.get("key", _build) == 1
+        assert cache.get("key", _build) == 1, "hit was rebuilt"
+
+        bump_data_version()
+        db.session.commit()
+        assert cache.get("key", _build) == 2
+        assert builds == [0, 1]
+
+        # Another worker's commit: no local bump, only the table changes
+        DataVersion.query.filter_by(name="clients").update({DataVersion.version: 5})
+        db.session.commit()
+        assert cache.get("key", _build) == 3
+        assert builds == [0, 1, 5]
+
+
+def test_commit_hooks_run_after_commit_only(sqlite_app, monkeypatch):
+    """Commit hooks run once per committed bump and never for a rolled-back one."""
+    monkeypatch.setattr(data_version, "_commit_hooks", [])
+    committed = []
+    on_version_committed(committed.append)
+    with sqlite_app.app_context():
+        bump_data_version()
+        assert committed == [], "hook ran before the commit"
+        db.session.commit()
+        assert committed == ["clients"]
+
+        bump_data_version()
+        db.session.rollback()
+        db.session.commit()
+        assert committed == ["clients"]
+        assert get_data_version() == 1
+
+
+def test_concurrent_first_bump(sqlite_app, monkeypatch):
+    """A first bump that loses the insert race increments the winner's row."""
+    with sqlite_app.app_context():
+        db.session.add(DataVersion(name="clients", version=3))
+        db.session.commit()
+
+        increment = data_version._increment
+        calls = []
+
+        def _lost_race(name):
+            # The row did not exist yet when this writer ran its UPDATE
+            calls.append(name)
+            return 0 if len(calls) == 1 else increment(name)
+
+        monkeypatch.setattr(data_version, "_increment", _lost_race)
+        bump_data_version()
+        db.session.commit()
+        assert len(calls) == 2
+        assert get_data_version() == 4
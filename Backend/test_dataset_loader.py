@@ -0,0 +1,30 @@
+"""
+Test the cached CSV loader across a torn (mid-write) read.
+"""
+
+import pandas as pd
+
+import ml_loader
+
+
+def test_torn_read_is_not_cached(tmp_path, override_config, monkeypatch):
+    """A torn read serves the last good frame once, then the finished file."""
+    override_config(USE_DATASET_SNAPSHOTS=False)
+    path = str(tmp_path / "clients.csv")
+    pd.DataFrame({"client_id": ["a"]}).to_csv(path, index=False)
+    assert ml_loader.load_dataset(path)["client_id"].tolist() == ["a"]
+
+    pd.DataFrame({"client_id": ["b", "c"]}).to_csv(path, index=False)
+    read = ml_loader._read_csv_consistent
+    torn = [True]
+
+    def _read_once_torn(file_path, stamp):
+        if torn:
+            torn.pop()
+            return None
+        return read(file_path, stamp)
+
+    monkeypatch.setattr(ml_loader, "_read_csv_consistent", _read_once_torn)
+    assert ml_loader.load_dataset(path)["client_id"].tolist() == ["a"]
+    # Same file stamp: the finished file must be parsed, not the fallback reused
+    assert ml_loader.load_dataset(path)["client_id"].tolist() == ["b", "c"]
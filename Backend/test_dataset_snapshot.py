@@ -0,0 +1,40 @@
+"""
+Test publishing, attaching and pruning shared dataset snapshots.
+"""
+
+import os
+
+import pandas as pd
+
+from utils.dataset_snapshot import attach_snapshot, plain_copy, publish_snapshot
+
+DATASET = "test_clients"
+
+
+def _frame(rows):
+    return pd.DataFrame({
+        "client_id": [f"C{i}" for i in range(rows)],
+        "Gender": pd.Categorical(["Female", "Male"] * (rows // 2)),
+        "balance": [float(i) for i in range(rows)],
+    })
+
+
+def test_publish_attach_prune(tmp_path, override_config):
+    """Published frames round-trip; older snapshots beyond SNAPSHOT_KEEP are pruned."""
+    override_config(SNAPSHOT_DIR=str(tmp_path), SNAPSHOT_KEEP=2)
+
+    assert attach_snapshot(DATASET) is None
+    first = publish_snapshot(_frame(4), version=1, source="db", dataset=DATASET)
+    assert first.version == 1 and first.source == "db"
+    pd.testing.assert_frame_equal(plain_copy(first.frame), plain_copy(_frame(4)), check_dtype=False)
+    assert attach_snapshot(DATASET) is first
+
+    publish_snapshot(_frame(6), version=2, dataset=DATASET)
+    latest = publish_snapshot(_frame(8), version=3, dataset=DATASET)
+    assert attach_snapshot(DATASET) is latest and len(latest.frame) == 8
+
+    kept = sorted(name for name in os.listdir(tmp_path / DATASET) if name.startswith("v"))
+    assert [name.split("-")[0] for name in kept] == ["v2", "v3"], kept
+    # A reader holding the first frame keeps its mapped pages
+    assert first.frame["balance"].sum() == 6.0
+    assert publish_snapshot(_frame(0), version=4, dataset=DATASET) is None
@@ -0,0 +1,43 @@
+"""
+Test that scatter downsampling keeps the data's density and cluster mix.
+"""
+
+import numpy as np
+
+from utils.downsample import COVERAGE_SHARE, stratified_sample
+
+
+def _gaussian(n, seed=1):
+    x, y = np.random.default_rng(seed).normal(size=(2, n))
+    return x, y
+
+
+def test_sample_density_matches_data():
+    """Core and tail shares, and a coarse 2D histogram, follow the data."""
+    x, y = _gaussian(200000)
+    radius = np.hypot(x, y)
+    for budget, grid in ((1000, 64), (4800, 100)):
+        keep = stratified_sample(x, y, np.zeros(len(x), dtype=int), budget, grid)
+        assert len(keep) == budget and len(np.unique(keep)) == budget
+
+        core, tail = radius < 1, radius > 2.5
+        assert abs(core[keep].mean() - core.mean()) < 0.05, (budget, core[keep].mean(), core.mean())
+        assert tail[keep].mean() < tail.mean() + COVERAGE_SHARE + 0.02, (budget, tail[keep].mean())
+
+        edges = np.linspace(-4, 4, 9)
+        data, _, _ = np.histogram2d(x, y, bins=[edges, edges])
+        sample, _, _ = np.histogram2d(x[keep], y[keep], bins=[edges, edges])
+        distance = 0.5 * np.abs(data / data.sum() - sample / sample.sum()).sum()
+        assert distance < 0.1, (budget, distance)
+
+
+def test_clusters_are_stratified():
+    """Each cluster keeps its share of the budget, and small clusters keep a point."""
+    x, y = _gaussian(50000, seed=2)
+    groups = np.where(np.arange(len(x)) < 45000, 0, 1)
+    groups[-3:] = 2
+    keep = stratified_sample(x, y, groups, 1000)
+    shares = np.bincount(groups[keep], minlength=3) / len(keep)
+    assert abs(shares[0] - 0.9) < 0.01 and abs(shares[1] - 0.1) < 0.01, shares
+    assert shares[2] > 0
+    assert np.array_equal(keep, stratified_sample(x, y, groups, 1000)), "sampling is not seeded"
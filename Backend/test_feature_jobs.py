@@ -0,0 +1,35 @@
+"""
+Test feature-importance job parameters and the result store's pruning.
+"""
+
+import os
+import time
+
+import pytest
+
+from utils.feature_jobs import MIN_REPLICATES, JobParamsError, _store_result, load_result, normalize_params
+
+
+def test_minimum_replicates():
+    """Sampled confidence intervals need at least MIN_REPLICATES replicates."""
+    for raw in ({"bootstraps": 2}, {"sample_size": 500, "n_estimators": 5}):
+        with pytest.raises(JobParamsError):
+            normalize_params(raw)
+    assert normalize_params({"bootstraps": MIN_REPLICATES})["bootstraps"] == MIN_REPLICATES
+    assert normalize_params({"n_estimators": 5})["n_estimators"] == 5  # full fit has no interval
+
+
+def test_results_are_pruned(tmp_path, override_config):
+    """Expired results are dropped and only the newest FEATURE_RESULTS_KEEP are kept."""
+    override_config(FEATURE_RESULTS_DIR=str(tmp_path), FEATURE_RESULTS_KEEP=3, FEATURE_RESULTS_MAX_AGE=3600)
+    now = time.time()
+    for i in range(5):
+        _store_result(f"r{i}", {"i": i})
+        os.utime(tmp_path / f"r{i}.json", (now - 10 + i, now - 10 + i))
+    _store_result("old", {"i": -1})
+    os.utime(tmp_path / "old.json", (now - 7200, now - 7200))
+    assert load_result("old") is None, "expired result was served"
+
+    _store_result("r5", {"i": 5})
+    assert sorted(os.listdir(tmp_path)) == ["r3.json", "r4.json", "r5.json"]
+    assert load_result("r4") == {"i": 4}
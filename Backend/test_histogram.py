@@ -0,0 +1,56 @@
+"""
+Test vectorized histograms against pandas and their per-frame cache.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.histogram import MAX_GROUPS, HistogramError, histogram
+
+
+def _frame(values, groups=None):
+    df = pd.DataFrame({"balance": values})
+    if groups is not None:
+        df["cluster_label"] = groups
+    return df
+
+
+def test_counts_match_pandas_cut():
+    """Bins follow the pd.cut(right=True, include_lowest=True) convention."""
+    values = np.random.default_rng(0).normal(100, 20, 5000)
+    df = _frame(values, np.where(values > 100, "high", "low"))
+    result = histogram(df, "balance", bins=12)
+    expected = pd.Series(pd.cut(values, result["edges"], right=True, include_lowest=True)).value_counts(sort=False)
+    assert result["counts"] == expected.tolist()
+
+    grouped = histogram(df, "balance", bins=12, by="cluster_label")
+    assert [g["group"] for g in grouped["groups"]] == ["high", "low"]
+    assert np.sum([g["counts"] for g in grouped["groups"]], axis=0).tolist() == result["counts"]
+
+
+def test_rejects_non_finite_edges():
+    """NaN or infinite explicit edges are a validation error."""
+    df = _frame([1.0, 2.0, 3.0])
+    for edges in ([0.0, float("nan"), 5.0], [0.0, 1.0, float("inf")]):
+        with pytest.raises(HistogramError):
+            histogram(df, "balance", edges=edges)
+
+
+def test_rebuilt_frame_is_not_served_stale():
+    """A new frame at the same data version is re-binned, even if it reuses an id."""
+    first = histogram(_frame([1.0] * 10), "balance", edges=[0.0, 5.0, 10.0])
+    second = histogram(_frame([9.0] * 10), "balance", edges=[0.0, 5.0, 10.0])
+    assert first["counts"] == [10, 0] and second["counts"] == [0, 10], (first, second)
+
+
+
+def test_rejects_high_cardinality_groups():
+    """Grouping by an id-like or continuous column is a validation error."""
+    df = _frame(np.arange(1000.0), np.arange(1000))
+    with pytest.raises(HistogramError, match="distinct values"):
+        histogram(df, "balance", by="cluster_label")
+    with pytest.raises(HistogramError):
+        histogram(df, "balance", by="balance")
+    df["cluster_label"] = np.arange(1000) % MAX_GROUPS
+    assert len(histogram(df, "balance", by="cluster_label")["groups"]) == MAX_GROUPS
@@ -0,0 +1,42 @@
+"""
+Test KLL quantile sketches and per-cluster sketch updates.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.quantile_sketch import EXACT_LIMIT, KLLSketch, get_cluster_sketches
+
+QS = [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]
+
+
+def test_exact_then_approximate():
+    """Exact (pandas-interpolated) up to EXACT_LIMIT values, close to exact beyond."""
+    values = np.random.default_rng(0).lognormal(8, 1, 50000)
+    sketch = KLLSketch(seed=1)
+    sketch.update(values[:EXACT_LIMIT])
+    assert sketch.exact
+    assert np.allclose(sketch.quantiles(QS), np.quantile(values[:EXACT_LIMIT], QS))
+
+    sketch.update(values[EXACT_LIMIT:])
+    assert not sketch.exact
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles([0.25, 0.5, 0.75])) / len(values)
+    assert np.all(np.abs(ranks - [0.25, 0.5, 0.75]) < 0.02), ranks
+
+
+def test_extend_keeps_previous_sketches():
+    """Appended rows go into copies; the previous frame's sketches are untouched."""
+    rng = np.random.default_rng(1)
+    old = pd.DataFrame({"cluster_label": rng.choice(["gold", "silver"], 300), "balance": rng.normal(100, 10, 300)})
+    new = pd.concat([old, pd.DataFrame({"cluster_label": ["gold"] * 50, "balance": [1000.0] * 50})], ignore_index=True)
+
+    old_sketches = get_cluster_sketches(old)
+    before = old_sketches.boxplot("balance")
+    new_sketches = get_cluster_sketches(new)
+
+    assert new_sketches is not old_sketches
+    assert get_cluster_sketches(old) is old_sketches, "old frame forced a rebuild"
+    assert old_sketches.boxplot("balance") == before
+    gold = new["balance"][new["cluster_label"] == "gold"]
+    assert new_sketches.sketch("balance", "gold").quantiles([0.5]) == [float(gold.median())]
+
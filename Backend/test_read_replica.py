@@ -0,0 +1,92 @@
+"""
+Test read-replica routing with two local SQLite files.
+
+The "replica" is a copy of the primary file taken at a point in time, which
+is enough to exercise the caught-up, lagging and unavailable cases.
+"""
+
+import os
+import shutil
+
+import pytest
+from sqlalchemy import text
+
+from models import db, ClientRecord
+from utils.data_version import bump_data_version
+from utils.read_routing import REPLICA_BIND, analytics_read, choose_read_engine, replica_breaker
+
+
+def _count_clients(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM clients")).scalar()
+
+
+def _add_clients(start, count):
+    for i in range(start, start + count):
+        db.session.add(ClientRecord(client_id=f"R{i}", age=30, balance=100.0 * i, tx_count=i, cluster_label=i % 3))
+    bump_data_version()
+    db.session.commit()
+
+
+@pytest.fixture
+def replica_path(tmp_path, override_config):
+    """Replica URL, configured before sqlite_app builds the app."""
+    path = tmp_path / "replica.db"
+    override_config(DATABASE_REPLICA_URL=f"sqlite:///{path}", USE_DATASET_SNAPSHOTS=False)
+    yield str(path)
+    replica_breaker.record_success()
+    # init_app registered a metadata for the bind; later apps have no replica
+    db.metadatas.pop(REPLICA_BIND, None)
+
+
+def test_replica_routing(replica_path, sqlite_app, tmp_path):
+    """Replica is used only while caught up; lag or errors fall back to primary."""
+    primary_path = str(tmp_path / "app.db")
+    with sqlite_app.app_context():
+        replica = db.engines["replica"]
+        replica_breaker.record_success()
+
+        _add_clients(0, 5)
+        # Replica has never been synced: reads must stay on the primary
+        engine, target = choose_read_engine()
+        assert target == "primary", target
+
+        # "Replicate" by copying the primary file
+        replica.dispose()
+        shutil.copy(primary_path, replica_path)
+        engine, target = choose_read_engine()
+        assert target == "replica", target
+        assert analytics_read(_count_clients) == 5
+
+        # New write on the primary: replica now lags and must be skipped
+        _add_clients(5, 3)
+        engine, target = choose_read_engine()
+        assert target == "primary", target
+        assert analytics_read(_count_clients) == 8
+
+        # Replica unavailable: reads fall back and the breaker records it
+        replica.dispose()
+        os.remove(replica_path)
+        assert analytics_read(_count_clients) == 8
+        assert replica_breaker.snapshot()["consecutive_failures"] >= 1
+
+
+def test_dashboard_and_analysis_read_replica(replica_path, sqlite_app, tmp_path):
+    """Overview, segments and ANOVA are answered by a caught-up replica."""
+    client = sqlite_app.test_client()
+    with sqlite_app.app_context():
+        _add_clients(0, 6)
+        db.engines["replica"].dispose()
+        shutil.copy(str(tmp_path / "app.db"), replica_path)
+        # Same data version, but R0 is gone from the replica: only a replica read sees 5 clients
+        with db.engines["replica"].begin() as conn:
+            conn.execute(text("DELETE FROM clients WHERE client_id = 'R0'"))
+        replica_breaker.record_success()
+
+    assert client.get("/api/dashboard/overview").get_json()["total_clients"] == 5
+    segments = client.get("/api/segments/distribution").get_json()["data"]
+    assert [row["Avg_Balance"] for row in segments] == [300.0, 250.0, 350.0], segments
+    features = {r["feature"] for r in client.get("/api/analysis/anova").get_json()["results"]}
+    assert {"age", "balance", "tx_count"} <= features, features
+    assert "balance" in client.get("/api/analysis/correlation").get_json()["columns"]
+    assert client.get("/api/analysis/association").status_code == 200
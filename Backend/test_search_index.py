@@ -0,0 +1,44 @@
+"""
+Test the client search index and its copy-on-extend updates.
+"""
+
+import pandas as pd
+
+from utils.search_index import get_search_index
+
+
+def _frame(start, stop, occupation):
+    return pd.DataFrame({
+        "client_id": [f"C{i:04d}" for i in range(start, stop)],
+        "Occupation": [occupation] * (stop - start),
+        "Branch_Location": ["Harare"] * (stop - start),
+    })
+
+
+def test_search():
+    """Prefix and token queries return id-ordered rows with totals."""
+    df = pd.concat([_frame(0, 30, "Teacher"), _frame(30, 40, "Retired Nurse")], ignore_index=True)
+    index = get_search_index(df)
+    positions, total = index.search(prefix="C001", per_page=5)
+    assert total == 10 and list(positions) == [10, 11, 12, 13, 14]
+    positions, total = index.search(text="nurse harare", page=2, per_page=4)
+    assert total == 10 and list(positions) == [34, 35, 36, 37]
+    assert index.position("C0005") == 5 and index.position("missing") is None
+
+
+def test_extend_keeps_previous_index():
+    """Appending rows builds a new index; the previous frame's index is untouched."""
+    old = _frame(0, 100, "Teacher")
+    new = pd.concat([old, _frame(100, 150, "Nurse")], ignore_index=True)
+    old_index = get_search_index(old)
+    new_index = get_search_index(new)
+
+    assert new_index is not old_index
+    assert get_search_index(old) is old_index, "old frame forced a rebuild"
+    assert get_search_index(new) is new_index
+
+    positions, total = old_index.search(text="harare", per_page=1000)
+    assert total == 100 and positions.max() < len(old)
+    assert old_index.position("C0120") is None and "nurse" not in old_index.postings
+    assert new_index.position("C0120") == 120 and new_index.search(text="nurse")[1] == 50
+
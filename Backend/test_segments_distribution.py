@@ -0,0 +1,39 @@
+"""
+Test the /segments/distribution cluster summary on both analytics engines.
+"""
+
+import pandas as pd
+import pytest
+
+import routes.graph_data as graph_data
+from utils.duckdb_engine import duckdb
+
+
+@pytest.fixture
+def csv_clients(sqlite_app, tmp_path, override_config, monkeypatch):
+    """CSV-only mode: the database holds no clients, the export holds six."""
+    override_config(USE_DATASET_SNAPSHOTS=True)
+    path = tmp_path / "clients.csv"
+    pd.DataFrame({
+        "CIFs": [f"C{i}" for i in range(6)],
+        "Account_Balance": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+        "risk_score": [1, 2, 3, 4, 5, "n/a"],
+        "Cluster": [0, 0, 1, 1, 2, 2],
+    }).to_csv(path, index=False)
+    monkeypatch.setattr(graph_data, "CSV_FALLBACK", str(path))
+    return sqlite_app.test_client()
+
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_cluster_summary(csv_clients, override_config, engine):
+    """Per-cluster means come from the shared frame, identically on each engine."""
+    if engine == "duckdb" and duckdb is None:
+        pytest.skip("duckdb is not installed")
+    override_config(ANALYTICS_ENGINE=engine)
+    body = csv_clients.get("/api/segments/distribution").get_json()
+    assert body["total_clusters"] == 3
+    assert body["data"] == [
+        {"Cluster": 0, "Avg_Balance": 15.0, "Avg_Risk_Score": 1.5},
+        {"Cluster": 1, "Avg_Balance": 35.0, "Avg_Risk_Score": 3.5},
+        {"Cluster": 2, "Avg_Balance": 55.0, "Avg_Risk_Score": 5.0},
+    ], body
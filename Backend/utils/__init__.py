@@ -28,6 +28,15 @@ from .email_service import (
     send_account_approved_email
 )
 
+from .data_version import (
+    CLIENTS_DATASET,
+    VersionedCache,
+    bump_data_version,
+    get_data_version,
+    on_version_committed,
+    file_stamp
+)
+
 __all__ = [
     'ResponseTemplate',
     'ErrorHandler', 
@@ -42,5 +51,11 @@ __all__ = [
     'EmailService',
     'send_verification_code_email',
     'send_welcome_email',
-    'send_account_approved_email'
+    'send_account_approved_email',
+    'CLIENTS_DATASET',
+    'VersionedCache',
+    'bump_data_version',
+    'get_data_version',
+    'on_version_committed',
+    'file_stamp'
 ]
@@ -0,0 +1,81 @@
+"""
+One-Pass One-Way ANOVA for ClientSphere API
+
+For every numeric feature at once, a single grouped reduction collects the
+per-cluster count, sum and sum of squares (of mean-shifted values, for
+numerical stability). Between- and within-group sums of squares, F and p are
+then derived as NumPy vectors, so the cost barely grows with the number of
+features. Missing values are dropped per feature, as with scipy's f_oneway.
+"""
+
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.data_version import VersionedCache
+
+_anova_cache = VersionedCache(max_entries=16)
+
+
+def group_moments(df: pd.DataFrame, group_col: str, columns: List[str]):
+    """Per-group (count, sum, sum of squares) arrays of shape (groups, features)."""
+    codes, _ = pd.factorize(df[group_col], use_na_sentinel=True)
+    values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    keep = codes >= 0
+    codes, values = codes[keep], values[keep]
+
+    present = ~np.isnan(values)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN columns
+        shift = np.nan_to_num(np.nanmean(values, axis=0))
+    centered = np.where(present, values - shift, 0.0)
+
+    k = len(columns)
+    stacked = pd.DataFrame(np.hstack([present.astype(np.float64), centered, centered * centered]))
+    sums = stacked.groupby(codes, sort=False).sum().to_numpy()
+    return sums[:, :k], sums[:, k:2 * k], sums[:, 2 * k:]
+
+
+def one_way_anova(df: pd.DataFrame, group_col: str, columns: List[str]) -> List[Dict]:
+    """F statistic and p-value of `group_col` for each column in `columns`."""
+    if not columns:
+        return []
+    n, s, ss = group_moments(df, group_col, columns)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_n = n.sum(axis=0)
+        total_s = s.sum(axis=0)
+        groups = (n > 0).sum(axis=0)
+        between_terms = np.where(n > 0, s * s / np.where(n > 0, n, 1), 0.0).sum(axis=0)
+        ss_between = between_terms - total_s ** 2 / total_n
+        ss_within = ss.sum(axis=0) - between_terms
+        df_between = groups - 1
+        df_within = total_n - groups
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+        p_value = stats.f.sf(f_stat, df_between, df_within)
+
+    # Same guard as before: need at least two groups with more than one value
+    enough = (n > 1).sum(axis=0) >= 2
+    results = []
+    for i, col in enumerate(columns):
+        f, p = float(f_stat[i]), float(p_value[i])
+        ok = enough[i] and np.isfinite(f) and np.isfinite(p)
+        results.append({"feature": col, "f_stat": f if ok else None, "p_value": p if ok else None})
+    return results
+
+
+def cached_anova(frame: pd.DataFrame, group_col: str = "cluster_label") -> Optional[List[Dict]]:
+    """
+    ANOVA over all numeric columns of `frame`, once per frame. Returns None
+    when the frame has no `group_col`.
+    """
+    def _build():
+        if group_col not in frame.columns:
+            return None
+        columns = [c for c in frame.select_dtypes(include=[np.number]).columns if c != group_col]
+        return one_way_anova(frame, group_col, columns)
+
+    return _anova_cache.get_for(frame, group_col, _build)
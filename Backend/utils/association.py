@@ -0,0 +1,123 @@
+"""
+Categorical Association Measures for ClientSphere API
+
+Covers the categorical half of the schema that Pearson correlation cannot
+see:
+
+* Cramér's V and the chi-square test for every pair of categorical columns;
+* the correlation ratio (eta) for every numeric x categorical pair.
+
+Each categorical column is integer-coded once. Every contingency table is a
+single np.bincount over combined codes, and the per-category sums for eta
+are bincounts with weights. Everything is computed once per dataset
+version and cached.
+"""
+
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils.data_version import VersionedCache
+
+# Columns with more distinct values than this are identifiers, not categories
+MAX_CATEGORIES = 50
+
+_assoc_cache = VersionedCache(max_entries=8)
+
+
+def _finite(value) -> Optional[float]:
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def encode_categoricals(df: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, int]]:
+    """Map each low-cardinality non-numeric column to (codes, n_categories); NaN is -1."""
+    encoded = {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col].dtype) or pd.api.types.is_bool_dtype(df[col].dtype):
+            continue
+        codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+        if 1 < len(uniques) <= MAX_CATEGORIES:
+            encoded[col] = (codes, len(uniques))
+    return encoded
+
+
+def contingency_table(a: Tuple[np.ndarray, int], b: Tuple[np.ndarray, int]) -> np.ndarray:
+    (codes_a, k_a), (codes_b, k_b) = a, b
+    valid = (codes_a >= 0) & (codes_b >= 0)
+    flat = np.bincount(codes_a[valid] * k_b + codes_b[valid], minlength=k_a * k_b)
+    return flat.reshape(k_a, k_b)
+
+
+def chi_square(table: np.ndarray) -> Dict[str, Optional[float]]:
+    """Chi-square independence test and Cramér's V for one contingency table."""
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    n = table.sum()
+    rows, cols = table.shape
+    if n == 0 or rows < 2 or cols < 2:
+        return {"chi2": None, "dof": None, "p_value": None, "cramers_v": None}
+
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    chi2 = float(((table - expected) ** 2 / expected).sum())
+    dof = (rows - 1) * (cols - 1)
+    return {
+        "chi2": _finite(chi2),
+        "dof": int(dof),
+        "p_value": _finite(stats.chi2.sf(chi2, dof)),
+        "cramers_v": _finite(np.sqrt(chi2 / n / min(rows - 1, cols - 1))),
+    }
+
+
+def correlation_ratio(codes: np.ndarray, k: int, values: np.ndarray) -> Optional[float]:
+    """Eta: share of a numeric column's spread explained by the categories."""
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    if len(values) < 2:
+        return None
+    values = values - values.mean()
+    counts = np.bincount(codes, minlength=k)
+    sums = np.bincount(codes, weights=values, minlength=k)
+    present = counts > 0
+    ss_between = (sums[present] ** 2 / counts[present]).sum()
+    ss_total = (values ** 2).sum()
+    if ss_total <= 0:
+        return None
+    return _finite(np.sqrt(min(ss_between / ss_total, 1.0)))
+
+
+def association_matrix(df: pd.DataFrame) -> Dict:
+    encoded = encode_categoricals(df)
+    categorical = list(encoded)
+    numeric = df.select_dtypes(include=[np.number]).columns.tolist()
+
+    size = len(categorical)
+    cramers_v: List[List[Optional[float]]] = [[None] * size for _ in range(size)]
+    tests = []
+    for i in range(size):
+        cramers_v[i][i] = 1.0
+    for i, j in combinations(range(size), 2):
+        a, b = categorical[i], categorical[j]
+        result = chi_square(contingency_table(encoded[a], encoded[b]))
+        cramers_v[i][j] = cramers_v[j][i] = result["cramers_v"]
+        tests.append({"a": a, "b": b, **result})
+
+    eta = []
+    for col in numeric:
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        eta.append([correlation_ratio(codes, k, values) for codes, k in encoded.values()])
+
+    return {
+        "categorical": categorical,
+        "numeric": numeric,
+        "cramers_v": cramers_v,
+        "chi_square": tests,
+        "correlation_ratio": eta,
+    }
+
+
+def cached_association(frame: pd.DataFrame) -> Dict:
+    """Association measures for `frame`, once per frame."""
+    return _assoc_cache.get_for(frame, "association", lambda: association_matrix(frame))
@@ -0,0 +1,174 @@
+"""
+Bitmap Indexes for Segment Drill-Down Filters
+
+For each low-cardinality attribute (Gender, Occupation, Branch_Location,
+Loan_Status, cluster_label) and each of its values, keep a bitmap over row
+positions in the client frame, packed 8 rows per byte. A filter such as
+"Female AND (Student OR Retired) AND Harare" becomes a few vectorized byte-wise
+ORs and ANDs. Only the matching rows are then materialised.
+
+Values are keyed by `value_label`, which utils.cube.match_values also uses
+for unindexed columns: in numeric columns 1, 1.0 and "1" are the same value.
+
+Indexes are built lazily once per dataset version and frame.
+"""
+
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_version import VersionedCache
+
+INDEXED_COLUMNS = ("Gender", "Occupation", "Branch_Location", "Loan_Status", "cluster_label")
+
+_index_cache = VersionedCache(max_entries=4)
+
+
+def numeric_labels(dtype) -> bool:
+    """Whether values of `dtype` (or its categories) compare as numbers."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def value_label(value, numeric: bool) -> Optional[str]:
+    """
+    Text a filter value or column value is compared as. In numeric columns
+    it is the canonical number (None if `value` is not a number).
+    """
+    if not numeric:
+        return str(value)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return str(int(value))
+        except ValueError:
+            pass
+    elif isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return str(int(value))
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if np.isnan(number):
+        return None
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def _popcount(packed: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(packed).sum())
+    return int(np.unpackbits(packed).sum())
+
+
+class BitmapIndex:
+    """Per-value packed bitmaps over the rows of one frame."""
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str] = INDEXED_COLUMNS):
+        self.n_rows = len(df)
+        self._frame = weakref.ref(df)
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        self.numeric: Dict[str, bool] = {}
+        for col in columns:
+            if col in df.columns:
+                self.numeric[col] = numeric_labels(df[col].dtype)
+                self.bitmaps[col] = self._build_column(df[col], self.numeric[col])
+
+    def _build_column(self, series: pd.Series, numeric: bool) -> Dict[str, np.ndarray]:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = np.asarray(series.array.codes)
+            labels = [value_label(c, numeric) for c in series.cat.categories]
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            labels = [value_label(u, numeric) for u in uniques]
+
+        # Sort once so each value's rows are a contiguous slice of `order`
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        column = {}
+        for code, label in enumerate(labels):
+            if label is None:
+                continue
+            bits = np.zeros(self.n_rows, dtype=bool)
+            bits[order[bounds[code]:bounds[code + 1]]] = True
+            packed = np.packbits(bits)
+            # Several categories can share a label (e.g. 1 and "1", or 1 and 1.0)
+            column[label] = packed if label not in column else (column[label] | packed)
+        return column
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        return self._frame() is df
+
+    def has_column(self, col: str) -> bool:
+        return col in self.bitmaps
+
+    def values(self, col: str) -> List[str]:
+        return list(self.bitmaps.get(col, {}))
+
+    def empty(self) -> np.ndarray:
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def full(self) -> np.ndarray:
+        return np.packbits(np.ones(self.n_rows, dtype=bool))
+
+    def lookup(self, col: str, values: Iterable[str]) -> np.ndarray:
+        """Rows where `col` equals any of `values`."""
+        column = self.bitmaps[col]
+        result = self.empty()
+        for value in values:
+            bitmap = column.get(value_label(value, self.numeric[col]))
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def select(self, filters: Dict[str, Iterable[str]], mode: str = "and") -> np.ndarray:
+        """
+        Combine per-column lookups with AND (default) or OR. Values listed
+        for the same column are always OR-ed.
+        """
+        if not filters:
+            return self.full()
+        result = None
+        for col, values in filters.items():
+            bitmap = self.lookup(col, values)
+            if result is None:
+                result = bitmap
+            elif mode == "or":
+                result |= bitmap
+            else:
+                result &= bitmap
+        return result
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return _popcount(bitmap)
+
+    def rows(self, bitmap: np.ndarray) -> np.ndarray:
+        """Row positions set in `bitmap`, ascending."""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.n_rows))
+
+    def mask(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bitmap, count=self.n_rows).astype(bool)
+
+
+def get_bitmap_index(df: pd.DataFrame) -> BitmapIndex:
+    """Bitmap index for `df`, built once per data version."""
+    index = _index_cache.get(id(df), lambda: BitmapIndex(df))
+    if not index.covers(df):
+        # id() was reused by a newer frame within the same data version
+        _index_cache.discard(id(df))
+        index = _index_cache.get(id(df), lambda: BitmapIndex(df))
+    return index
+
+
+def indexed_mask(df: pd.DataFrame, filters) -> Optional[np.ndarray]:
+    """
+    Boolean row mask for `filters` via the bitmap index, or None if any
+    filtered column is not indexed.
+    """
+    filters = dict(filters)
+    index = get_bitmap_index(df)
+    if not all(index.has_column(col) for col in filters):
+        return None
+    return index.mask(index.select(filters))
@@ -0,0 +1,332 @@
+"""
+Background, Incremental Chart Regeneration
+
+Charts are rendered by a background job instead of inside a request. The
+job is queued after every commit that bumps the clients data version (see
+routes.generate_charts), whichever write path made it, and after each pass
+it checks whether the version moved while it was rendering, in which case
+it runs once more. Serving a chart never schedules work. For every chart
+the job first derives the small input aggregates the chart is drawn
+from, such as per-cluster totals or the plotted columns, and hashes them.
+A chart is only re-rendered when that hash differs from the one recorded in
+the charts manifest, so a new data version that leaves a chart's inputs
+unchanged costs one hash and no drawing.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_version import get_data_version
+from utils.chart_render import px, render_charts
+from utils.chart_renditions import warm_renditions
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CHARTS_DIR = os.path.join(BASE_DIR, "ML assets", "charts")
+MANIFEST_FILE = "manifest.json"
+
+SEGMENT_ORDER = ["bronze", "silver", "gold", "platinum"]
+
+_lock = threading.Lock()
+_idle = threading.Condition(_lock)
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-regen")
+_state: Dict[str, Any] = {"job": None, "rerun": False, "rerun_force": False}
+
+
+# -------------------------------------------------------------------
+# Chart inputs
+# -------------------------------------------------------------------
+
+def prepare_chart_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize the cluster/balance columns the charts are drawn from."""
+    if "cluster_label" not in df.columns:
+        for alt in ["cluster", "segment", "Cluster"]:
+            if alt in df.columns:
+                df = df.rename(columns={alt: "cluster_label"})
+                break
+    if "balance" not in df.columns:
+        for alt in ["Balance", "account_balance", "avg_balance"]:
+            if alt in df.columns:
+                df = df.rename(columns={alt: "balance"})
+                break
+    df["balance"] = pd.to_numeric(df.get("balance", 0), errors="coerce").fillna(0.0)
+    return df
+
+
+def _first_column(df, candidates):
+    return next((c for c in candidates if c in df.columns), None)
+
+
+def _text(values):
+    return [str(v) for v in values]
+
+
+def _scatter(df, x, y, color, title, labels, category_orders=None):
+    columns = {
+        x: pd.to_numeric(df[x], errors="coerce").to_numpy(dtype=np.float64),
+        y: pd.to_numeric(df[y], errors="coerce").to_numpy(dtype=np.float64),
+        color: _text(df[color]),
+    }
+    figure = {"x": x, "y": y, "color": color, "title": title, "labels": labels}
+    if category_orders:
+        figure["category_orders"] = category_orders
+    return {"columns": columns, "figure": figure}
+
+
+def chart_inputs(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    Map chart name -> {"file", "kind", "inputs"} for every chart that can be
+    drawn from `df`. Inputs hold only what the renderer needs.
+    """
+    df = prepare_chart_frame(df)
+    charts = {}
+
+    if "cluster_label" in df.columns:
+        # 1) Balance by cluster (bar chart)
+        agg = df.groupby("cluster_label")["balance"].sum().sort_values(ascending=False)
+        charts["balance_bar"] = {"file": "balance_analysis.png", "kind": "bar", "inputs": {
+            "labels": _text(agg.index), "values": agg.to_numpy(dtype=np.float64),
+            "title": "Total Balance by Cluster", "ylabel": "Total Balance",
+        }}
+
+        # 2) Cluster distribution (pie)
+        counts = df["cluster_label"].value_counts()
+        charts["segment_pie"] = {"file": "segment_distribution.png", "kind": "pie", "inputs": {
+            "labels": _text(counts.index), "values": counts.to_numpy(dtype=np.int64),
+            "title": "Client Distribution by Cluster",
+        }}
+
+        # 3) Balance boxplot per cluster
+        grouped = df.groupby("cluster_label", sort=False)["balance"]
+        charts["balance_box"] = {"file": "balance_box.png", "kind": "box", "inputs": {
+            "groups": _text(grouped.groups.keys()),
+            "values": [g.to_numpy(dtype=np.float64) for _, g in grouped],
+            "title": "Balance Distribution by Cluster", "xlabel": "cluster_label", "ylabel": "balance",
+        }}
+
+    if px is None:
+        return charts
+
+    income_col = _first_column(df, ["Monthly_Income", "monthly_income", "income"])
+
+    # 4) Balance vs predicted value with 4 standardized segments
+    if "predicted_value" not in df.columns:
+        # heuristic: use balance and optional income to synthesize
+        if income_col is not None:
+            df["predicted_value"] = df["balance"].fillna(0) * 1.8 + df[income_col].fillna(0) * 6.5
+        else:
+            df["predicted_value"] = df["balance"].fillna(0) * 2.0
+    try:
+        df["__segment4"] = pd.qcut(
+            pd.to_numeric(df["balance"], errors="coerce").fillna(0).rank(method="first"),
+            4, labels=SEGMENT_ORDER,
+        )
+        charts["interactive_scatter"] = {"file": "interactive_scatter.html", "kind": "plotly_scatter",
+                                         "inputs": _scatter(
+            df, "balance", "predicted_value", "__segment4",
+            "Client Segments: Balance vs Predicted Value",
+            {"balance": "Account Balance ($)", "predicted_value": "Predicted Value ($)", "__segment4": "Client Segment"},
+            category_orders={"__segment4": SEGMENT_ORDER},
+        )}
+    except Exception as e:
+        logger.warning(f"Skipping interactive_scatter: {e}")
+
+    if "cluster_label" not in df.columns:
+        return charts
+
+    # 5) Monthly income vs balance
+    if income_col is not None:
+        charts["interactive_income_balance"] = {"file": "interactive_income_balance.html", "kind": "plotly_scatter",
+                                                "inputs": _scatter(
+            df, income_col, "balance", "cluster_label", "Client Segments: Income vs Balance",
+            {income_col: "Monthly Income ($)", "balance": "Account Balance ($)", "cluster_label": "Client Segment"},
+        )}
+
+    # 6) Transactions vs predicted value
+    tx_col = _first_column(df, ["tx_count", "Transaction_Frequency", "transactions"])
+    if tx_col is not None:
+        charts["interactive_tx_pred"] = {"file": "interactive_tx_pred.html", "kind": "plotly_scatter",
+                                         "inputs": _scatter(
+            df, tx_col, "predicted_value", "cluster_label", "Client Segments: Transactions vs Predicted Value",
+            {tx_col: "Transactions", "predicted_value": "Predicted Value ($)", "cluster_label": "Client Segment"},
+        )}
+    return charts
+
+
+def content_hash(kind: str, inputs: Any) -> str:
+    """Stable hash of a chart's kind and input aggregates."""
+    digest = hashlib.sha1(kind.encode("utf-8"))
+
+    def _feed(value):
+        if isinstance(value, np.ndarray):
+            digest.update(str(value.dtype).encode("utf-8"))
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, dict):
+            for key in sorted(value):
+                digest.update(str(key).encode("utf-8"))
+                _feed(value[key])
+        elif isinstance(value, (list, tuple)):
+            digest.update(b"[")
+            for item in value:
+                _feed(item)
+            digest.update(b"]")
+        else:
+            digest.update(json.dumps(value, default=str).encode("utf-8"))
+
+    _feed(inputs)
+    return digest.hexdigest()
+
+
+# -------------------------------------------------------------------
+# Manifest
+# -------------------------------------------------------------------
+
+def load_manifest(charts_dir: str = CHARTS_DIR) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(charts_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"data_version": None, "charts": {}}
+
+
+def _save_manifest(manifest: Dict[str, Any], charts_dir: str) -> None:
+    path = os.path.join(charts_dir, MANIFEST_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def chart_paths(charts_dir: str = CHARTS_DIR) -> Dict[str, Optional[str]]:
+    """Chart name -> file path for every chart recorded in the manifest."""
+    charts = load_manifest(charts_dir).get("charts", {})
+    return {name: os.path.join(charts_dir, entry["file"]) for name, entry in charts.items()}
+
+
+# -------------------------------------------------------------------
+# Regeneration
+# -------------------------------------------------------------------
+
+def regenerate(df: pd.DataFrame, data_version: Optional[int] = None, force: bool = False,
+               charts_dir: str = CHARTS_DIR) -> Dict[str, Dict[str, Any]]:
+    """
+    Render the charts whose input hash changed (all of them with `force`),
+    concurrently in the chart worker pool, and return a per-chart report of
+    status and render time.
+    """
+    os.makedirs(charts_dir, exist_ok=True)
+    manifest = load_manifest(charts_dir)
+    recorded = manifest.setdefault("charts", {})
+    report = {}
+
+    pending, hashes = {}, {}
+    for name, chart in chart_inputs(df).items():
+        digest = content_hash(chart["kind"], chart["inputs"])
+        path = os.path.join(charts_dir, chart["file"])
+        entry = recorded.get(name)
+        if not force and entry and entry.get("hash") == digest and os.path.exists(path):
+            report[name] = {"status": "unchanged", "file": chart["file"]}
+            continue
+        pending[name] = (chart["kind"], chart["inputs"], path)
+        hashes[name] = (chart["file"], digest)
+
+    for name, outcome in render_charts(pending).items():
+        file, digest = hashes[name]
+        if "error" in outcome:
+            logger.warning(f"Rendering chart '{name}' failed: {outcome['error']}")
+            report[name] = {"status": "failed", "file": file, "error": outcome["error"]}
+            continue
+        recorded[name] = {"file": file, "hash": digest, "rendered_at": time.time()}
+        report[name] = {"status": "rendered", "file": file, "ms": outcome["ms"]}
+        try:
+            warm_renditions(charts_dir, file)
+        except Exception as e:
+            logger.warning(f"Creating renditions of '{name}' failed: {e}")
+
+    manifest["data_version"] = data_version
+    _save_manifest(manifest, charts_dir)
+    return report
+
+
+def _warm(warmers, df) -> None:
+    for warm in warmers:
+        try:
+            warm(df)
+        except Exception as e:
+            logger.warning(f"Chart warmer {getattr(warm, '__name__', warm)} failed: {e}")
+
+
+def _run_job(app, load_frame, force, warmers):
+    while True:
+        job = _state["job"]
+        job.update(status="running", started_at=time.time())
+        stale = False
+        try:
+            with app.app_context():
+                version = get_data_version()
+                df = load_frame()
+                job["data_version"] = version
+                job["charts"] = {} if df.empty else regenerate(df, version, force=force)
+                if not df.empty:
+                    _warm(warmers, df)
+                stale = get_data_version(max_age_ms=0) != version
+            job["status"] = "done"
+        except Exception as e:
+            logger.exception("Chart regeneration failed")
+            job.update(status="failed", error=str(e))
+        finally:
+            job["finished_at"] = time.time()
+            job["elapsed_ms"] = round((job["finished_at"] - job["started_at"]) * 1000.0, 1)
+
+        with _lock:
+            _state["rerun"] = _state["rerun"] or stale
+            if not _state["rerun"]:
+                _idle.notify_all()
+                return
+            # Data changed again while rendering: go once more
+            force = _state["rerun_force"]
+            _state.update(rerun=False, rerun_force=False)
+            _state["job"] = {"status": "queued", "force": force, "submitted_at": time.time()}
+
+
+def schedule_regeneration(app, load_frame, force: bool = False, warmers=()) -> Dict[str, Any]:
+    """
+    Queue a background regeneration. If one is already queued or running,
+    it is reused and another pass is scheduled to follow it. Each callable
+    in `warmers` is called with the loaded frame after the charts are drawn,
+    to precompute other per-version chart artifacts.
+    """
+    with _lock:
+        job = _state["job"]
+        if job is not None and job["status"] in ("queued", "running"):
+            _state["rerun"] = True
+            _state["rerun_force"] = _state["rerun_force"] or force
+            return dict(job)
+        job = {"status": "queued", "force": force, "submitted_at": time.time()}
+        _state["job"] = job
+        _executor.submit(_run_job, app, load_frame, force, tuple(warmers))
+        return dict(job)
+
+
+def current_job() -> Optional[Dict[str, Any]]:
+    job = _state["job"]
+    return dict(job) if job is not None else None
+
+
+def wait_for_job(timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Block until no regeneration is queued or running; return the last job."""
+    with _idle:
+        _idle.wait_for(lambda: _state["job"] is None or _state["job"]["status"] not in ("queued", "running"),
+                       timeout=timeout)
+    return current_job()
+
@@ -0,0 +1,163 @@
+"""
+Chart Renderers for ClientSphere API
+
+Each renderer turns the plain input aggregates prepared by utils.chart_jobs
+into one chart file. Files are written to a temporary name and moved into
+place, so a chart that is being served is never half-written. matplotlib is
+pinned to the non-interactive Agg backend, so rendering works off the main
+thread.
+
+pyplot keeps global state and is not thread-safe, so independent charts are
+drawn concurrently in a pool of worker processes rather than threads. Each
+chart is one task, and each worker runs its own Agg backend.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+try:
+    import plotly.express as px
+except Exception:  # keep server running if plotly is missing
+    px = None
+
+import config
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _atomic_write(path, write):
+    base, ext = os.path.splitext(path)
+    tmp = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _save_figure(path):
+    plt.tight_layout()
+    _atomic_write(path, plt.savefig)
+    plt.close()
+
+
+def render_bar(inputs, path):
+    plt.figure(figsize=(8, 5))
+    sns.barplot(x=inputs["labels"], y=inputs["values"], palette="Reds_r")
+    plt.xticks(rotation=30, ha="right")
+    plt.title(inputs["title"])
+    plt.ylabel(inputs["ylabel"])
+    _save_figure(path)
+
+
+def render_pie(inputs, path):
+    plt.figure(figsize=(6, 6))
+    plt.pie(inputs["values"], labels=inputs["labels"], autopct="%1.1f%%", startangle=140)
+    plt.title(inputs["title"])
+    _save_figure(path)
+
+
+def render_box(inputs, path):
+    groups = inputs["groups"]
+    frame = pd.DataFrame({
+        "group": np.repeat(np.asarray(groups, dtype=object), [len(v) for v in inputs["values"]]),
+        "value": np.concatenate(inputs["values"]) if inputs["values"] else [],
+    })
+    plt.figure(figsize=(8, 5))
+    sns.boxplot(data=frame, x="group", y="value", order=groups, palette="Blues")
+    plt.xticks(rotation=30, ha="right")
+    plt.title(inputs["title"])
+    plt.xlabel(inputs["xlabel"])
+    plt.ylabel(inputs["ylabel"])
+    _save_figure(path)
+
+
+def render_plotly_scatter(inputs, path):
+    if px is None:
+        raise RuntimeError("plotly is not installed")
+    fig = px.scatter(pd.DataFrame(inputs["columns"]), **inputs["figure"])
+    _atomic_write(path, lambda tmp: fig.write_html(tmp, include_plotlyjs="cdn"))
+
+
+RENDERERS = {
+    "bar": render_bar,
+    "pie": render_pie,
+    "box": render_box,
+    "plotly_scatter": render_plotly_scatter,
+}
+
+
+def render_chart(kind, inputs, path):
+    """Render one chart and return the elapsed time in milliseconds."""
+    started = time.perf_counter()
+    RENDERERS[kind](inputs, path)
+    return (time.perf_counter() - started) * 1000.0
+
+
+def _init_worker():
+    matplotlib.use("Agg", force=True)
+
+
+def render_task(kind, inputs, path):
+    """Worker entry point: render one chart, return (ms, error message or None)."""
+    try:
+        return render_chart(kind, inputs, path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if config.CHART_RENDER_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process holds threads and DB connections
+            _pool = ProcessPoolExecutor(max_workers=config.CHART_RENDER_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_charts(tasks: Dict[str, tuple]) -> Dict[str, Dict]:
+    """
+    Render independent charts concurrently. `tasks` maps chart name ->
+    (kind, inputs, path). Returns chart name -> {"ms": ...} or {"error": ...}.
+    Falls back to rendering in this process when the pool is disabled or breaks.
+    """
+    pool = _get_pool() if len(tasks) > 1 else None
+    results = {}
+    if pool is not None:
+        try:
+            futures = {name: pool.submit(render_task, *task) for name, task in tasks.items()}
+            for name, future in futures.items():
+                results[name] = future.result()
+        except Exception:
+            # A worker died (BrokenProcessPool) or could not start; retry locally
+            _reset_pool()
+            results = {}
+    for name, task in tasks.items():
+        if name not in results:
+            results[name] = render_task(*task)
+    return {name: ({"error": error} if error else {"ms": round(ms, 1)})
+            for name, (ms, error) in results.items()}
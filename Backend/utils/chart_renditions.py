@@ -0,0 +1,130 @@
+"""
+Multi-Resolution Chart Renditions
+
+PNG charts are resampled to a few standard widths (thumbnail, tile, full)
+and encoded as PNG or WebP on first request. Renditions are stored on disk
+under the charts directory, named by a hash of the source file's content,
+so they stay valid across restarts and workers, and are replaced as soon as
+the chart is redrawn. Renditions from an older version of a chart are
+removed when a new one is written. Without Pillow the original file is
+served.
+"""
+
+import os
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+try:
+    from PIL import Image
+except Exception:  # Pillow is optional; serve the original files without it
+    Image = None
+
+RENDITION_WIDTHS = {"thumb": 240, "tile": 480, "full": None}
+RENDITION_FORMATS = {"png": "image/png", "webp": "image/webp"}
+RESAMPLABLE_EXTENSIONS = (".png",)
+RENDITIONS_SUBDIR = "renditions"
+WEBP_QUALITY = 85
+
+_hash_lock = threading.Lock()
+_hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+class RenditionError(ValueError):
+    """Raised for an unknown rendition size or format."""
+
+
+class RenditionPathError(RenditionError):
+    """Raised for a chart path that does not resolve under the charts directory."""
+
+
+def _inside(root: str, path: str) -> bool:
+    root = os.path.realpath(root)
+    return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+
+def content_hash(path: str) -> str:
+    """SHA-1 of a file's bytes, memoized on its mtime and size."""
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _hash_lock:
+        cached = _hashes.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    with _hash_lock:
+        _hashes[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _remove_stale(directory: str, stem: str, digest: str) -> None:
+    for name in os.listdir(directory):
+        parts = name.rsplit(".", 3)
+        if len(parts) == 4 and parts[0] == stem and parts[1] != digest:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _write_rendition(source: str, target: str, width: Optional[int], fmt: str) -> None:
+    with Image.open(source) as image:
+        image.load()
+        if width is not None and image.width > width:
+            height = max(round(image.height * width / image.width), 1)
+            image = image.resize((width, height), Image.LANCZOS)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if fmt == "webp":
+                image.save(tmp, format="WEBP", quality=WEBP_QUALITY, method=4)
+            else:
+                image.save(tmp, format="PNG", optimize=True)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def rendition(charts_dir: str, filename: str, size: str = "full",
+              fmt: str = "png") -> Tuple[str, str]:
+    """
+    (directory, filename) to serve for `filename` at `size` in `fmt`,
+    creating the rendition if needed. Files that cannot be resampled, and the
+    original full-size PNG, are returned as-is.
+    """
+    if size not in RENDITION_WIDTHS:
+        raise RenditionError(f"size must be one of: {', '.join(RENDITION_WIDTHS)}")
+    if fmt not in RENDITION_FORMATS:
+        raise RenditionError(f"format must be one of: {', '.join(RENDITION_FORMATS)}")
+
+    source = os.path.join(charts_dir, filename)
+    if not _inside(charts_dir, source):
+        raise RenditionPathError(f"Chart path escapes the charts directory: {filename}")
+    stem, ext = os.path.splitext(filename)
+    if Image is None or ext.lower() not in RESAMPLABLE_EXTENSIONS or (size == "full" and fmt == "png"):
+        return charts_dir, filename
+
+    directory = os.path.join(charts_dir, RENDITIONS_SUBDIR, os.path.dirname(filename))
+    stem = os.path.basename(stem)
+    digest = content_hash(source)[:16]
+    name = f"{stem}.{digest}.{size}.{fmt}"
+    target = os.path.join(directory, name)
+    if not _inside(os.path.join(charts_dir, RENDITIONS_SUBDIR), target):
+        raise RenditionPathError(f"Chart path escapes the charts directory: {filename}")
+    if not os.path.exists(target):
+        os.makedirs(directory, exist_ok=True)
+        _write_rendition(source, target, RENDITION_WIDTHS[size], fmt)
+        _remove_stale(directory, stem, digest)
+    return directory, name
+
+
+def warm_renditions(charts_dir: str, filename: str) -> None:
+    """Create every rendition of a freshly drawn chart ahead of the first request."""
+    if Image is None or not filename.lower().endswith(RESAMPLABLE_EXTENSIONS):
+        return
+    for size in RENDITION_WIDTHS:
+        for fmt in RENDITION_FORMATS:
+            rendition(charts_dir, filename, size, fmt)
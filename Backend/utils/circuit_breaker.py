@@ -0,0 +1,101 @@
+"""
+Circuit Breaker for ClientSphere API
+
+Wraps calls to a dependency that can go away (the database). After
+``failure_threshold`` consecutive failures the breaker opens and callers skip
+the dependency entirely for ``reset_timeout`` seconds, serving cached data
+instead of waiting out a connect timeout on every request. After the cool-down
+a single trial call is let through (half-open); success closes the breaker,
+failure re-opens it for another cool-down.
+"""
+
+import threading
+import time
+import logging
+from typing import Dict
+
+import config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker, safe to share between threads."""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected without trying the dependency."""
+        with self._lock:
+            return self._state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        """Return True if the caller may try the dependency now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                self.rejected += 1
+                return False
+            # Cool-down elapsed: let exactly one trial call through
+            self._state = HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed again")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self._failures} failure(s); "
+                        f"retrying in {self.reset_timeout:g}s"
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        state = self.state
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_s": self.reset_timeout,
+                "rejected_calls": self.rejected,
+            }
+
+
+# Shared by every database read on the analytics path in this process
+db_breaker = CircuitBreaker("database", config.DB_BREAKER_FAILURES, config.DB_BREAKER_RESET_SECONDS)
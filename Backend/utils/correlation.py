@@ -0,0 +1,168 @@
+"""
+Incremental Correlation Matrices for ClientSphere API
+
+Pearson correlations are derived from mergeable co-moment accumulators: for
+every column pair, the count, sums, sums of squares and cross-products over
+rows where both values are present (pandas' pairwise-complete semantics).
+Values are shifted by the column means of the first build before summing,
+which keeps the sums well conditioned; with that shift the accumulators
+are plain sums, so batches can be added or subtracted.
+
+When the dataset changes, rows are matched between the old and new version
+by row hash. Only rows that appeared or disappeared are added to or
+subtracted from the previous accumulator, so appending rows does not
+rescan the whole dataset. Results are cached per dataset version.
+
+Spearman mode ranks each column once per version (average ranks for ties)
+and correlates the ranks in a single pass.
+"""
+
+import logging
+import threading
+import warnings
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_version import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_METHODS = ("pearson", "spearman")
+
+# Above this share of changed rows, rebuilding is cheaper than patching
+MAX_DELTA_FRACTION = 0.5
+
+_corr_cache = VersionedCache(max_entries=16)
+_lock = threading.Lock()
+_states = {}  # dataset name -> _DatasetState from the last version seen
+
+
+class MomentAccumulator:
+    """Pairwise-complete co-moments of a fixed set of columns."""
+
+    def __init__(self, columns: List[str], shift: np.ndarray):
+        k = len(columns)
+        self.columns = list(columns)
+        self.shift = shift
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))    # sx[i, j]: sum of x_i where x_i and x_j are present
+        self.sxx = np.zeros((k, k))   # sxx[i, j]: sum of x_i ** 2, same rows
+        self.sxy = np.zeros((k, k))   # sxy[i, j]: sum of x_i * x_j
+
+    @classmethod
+    def from_values(cls, columns: List[str], values: np.ndarray) -> "MomentAccumulator":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN columns
+            shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(len(columns))
+        acc = cls(columns, shift)
+        acc.add(values)
+        return acc
+
+    def copy(self) -> "MomentAccumulator":
+        acc = MomentAccumulator(self.columns, self.shift)
+        acc.n, acc.sx, acc.sxx, acc.sxy = self.n.copy(), self.sx.copy(), self.sxx.copy(), self.sxy.copy()
+        return acc
+
+    def add(self, values: np.ndarray, sign: float = 1.0) -> None:
+        if not len(values):
+            return
+        present = ~np.isnan(values)
+        m = present.astype(np.float64)
+        x = np.where(present, values - self.shift, 0.0)
+        self.n += sign * (m.T @ m)
+        self.sx += sign * (x.T @ m)
+        self.sxx += sign * ((x * x).T @ m)
+        self.sxy += sign * (x.T @ x)
+
+    def remove(self, values: np.ndarray) -> None:
+        self.add(values, sign=-1.0)
+
+    def correlation(self) -> np.ndarray:
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sxy - self.sx * self.sx.T / n
+            var = self.sxx - self.sx ** 2 / n
+            corr = cov / np.sqrt(var * var.T)
+        valid = (n >= 2) & (var > 0) & (var.T > 0)
+        corr = np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+        diagonal = np.diag(valid)
+        corr[diagonal, diagonal] = 1.0
+        return corr
+
+
+class _DatasetState:
+    def __init__(self, columns, values, hashes, acc):
+        self.columns = columns
+        self.values = values
+        self.hashes = hashes
+        self.acc = acc
+
+
+def _row_hashes(numeric_df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(numeric_df, index=False).to_numpy()
+
+
+def row_diff(old_hashes: np.ndarray, new_hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positions of rows added in `new_hashes` and removed from `old_hashes`,
+    treating both as multisets: the k-th copy of a row matches the k-th copy
+    on the other side.
+    """
+    old = pd.Series(old_hashes)
+    new = pd.Series(new_hashes)
+    old_counts = old.value_counts()
+    new_counts = new.value_counts()
+    added = new.groupby(new).cumcount() >= new.map(old_counts).fillna(0)
+    removed = old.groupby(old).cumcount() >= old.map(new_counts).fillna(0)
+    return np.flatnonzero(added.to_numpy()), np.flatnonzero(removed.to_numpy())
+
+
+def pearson_accumulator(dataset: str, numeric_df: pd.DataFrame) -> MomentAccumulator:
+    """
+    Accumulator for the current version of `dataset`, patched from the
+    previous version's accumulator when few rows changed.
+    """
+    columns = list(numeric_df.columns)
+    values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+    hashes = _row_hashes(numeric_df)
+
+    with _lock:
+        prev = _states.get(dataset)
+        acc = None
+        if prev is not None and prev.columns == columns:
+            added, removed = row_diff(prev.hashes, hashes)
+            if len(added) + len(removed) <= MAX_DELTA_FRACTION * max(len(values), 1):
+                acc = prev.acc.copy()
+                acc.add(values[added])
+                acc.remove(prev.values[removed])
+                logger.info(f"Correlation accumulators for '{dataset}' patched: +{len(added)} / -{len(removed)} rows")
+        if acc is None:
+            acc = MomentAccumulator.from_values(columns, values)
+        _states[dataset] = _DatasetState(columns, values, hashes, acc)
+    return acc
+
+
+def rank_values(numeric_df: pd.DataFrame) -> np.ndarray:
+    """Average ranks per column; missing values stay NaN."""
+    return numeric_df.rank(method="average").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def cached_correlation(frame: pd.DataFrame, dataset: str, method: str = "pearson") -> Tuple[List[str], np.ndarray]:
+    """
+    Return (columns, matrix) over the numeric columns of `frame`, once per
+    frame. `dataset` names the accumulator that is patched between versions.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unknown correlation method '{method}'")
+
+    def _build():
+        numeric_df = frame.select_dtypes(include=[np.number])
+        columns = list(numeric_df.columns)
+        if method == "spearman":
+            ranks = _corr_cache.get_for(frame, ("ranks", dataset), lambda: rank_values(numeric_df))
+            return columns, MomentAccumulator.from_values(columns, ranks).correlation()
+        return columns, pearson_accumulator(dataset, numeric_df).correlation()
+
+    return _corr_cache.get_for(frame, (method, dataset), _build)
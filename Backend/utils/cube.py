@@ -0,0 +1,196 @@
+"""
+Cached Group-By Aggregation (OLAP Cube) for ClientSphere API
+
+A cube query names dimensions to group by, measures to compute and optional
+filters, e.g. "average balance by Branch_Location x cluster_label" or "loan
+approval rate by Occupation". Queries run over the shared columnar client
+frame, and results are memoised per dataset version. Common cuboids are
+precomputed when new data is ingested.
+
+Measure syntax:
+    count                 rows in the group
+    sum:col / avg:col     sum / mean of a numeric column
+    min:col / max:col     extremes of a numeric column
+    rate:col=value        share of rows where col == value
+"""
+
+import logging
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_version import VersionedCache
+from utils.bitmap_index import indexed_mask, numeric_labels, value_label
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_AGGS = {"sum": "sum", "avg": "mean", "min": "min", "max": "max"}
+MAX_DIMENSIONS = 4
+
+# Slices the dashboard asks for most; computed right after each ingest
+COMMON_CUBOIDS = [
+    (("cluster_label",), ("count", "sum:balance", "avg:balance")),
+    (("Branch_Location",), ("count", "avg:balance")),
+    (("Occupation",), ("count", "rate:Loan_Status=Approved")),
+    (("Branch_Location", "cluster_label"), ("count", "avg:balance")),
+    (("Gender", "cluster_label"), ("count", "avg:balance")),
+]
+
+_cube_cache = VersionedCache(max_entries=256)
+
+
+class CubeError(ValueError):
+    """Raised for cube queries that reference unknown columns or measures."""
+
+
+class Measure:
+    def __init__(self, spec: str):
+        self.spec = spec.strip()
+        if self.spec == "count":
+            self.agg, self.column, self.value = "count", None, None
+            return
+        agg, sep, rest = self.spec.partition(":")
+        if not sep or not rest:
+            raise CubeError(f"Invalid measure '{spec}'")
+        if agg == "rate":
+            column, eq, value = rest.partition("=")
+            if not eq:
+                raise CubeError(f"Rate measure needs col=value: '{spec}'")
+            self.agg, self.column, self.value = "rate", column, value
+        elif agg in NUMERIC_AGGS:
+            self.agg, self.column, self.value = agg, rest, None
+        else:
+            raise CubeError(f"Unknown aggregation '{agg}' in '{spec}'")
+
+
+class CubeQuery:
+    """Normalized, hashable cube request."""
+
+    def __init__(self, dimensions: Iterable[str], measures: Iterable[str],
+                 filters: Optional[Dict[str, List[str]]] = None):
+        self.dimensions = tuple(d for d in dimensions if d)
+        self.measures = tuple(Measure(m) for m in (measures or ["count"]))
+        self.filters = tuple(sorted(
+            (col, tuple(sorted(str(v) for v in values))) for col, values in (filters or {}).items()
+        ))
+        if len(self.dimensions) > MAX_DIMENSIONS:
+            raise CubeError(f"At most {MAX_DIMENSIONS} dimensions are supported")
+
+    @property
+    def key(self) -> Tuple:
+        return (self.dimensions, tuple(m.spec for m in self.measures), self.filters)
+
+    def columns(self) -> List[str]:
+        cols = list(self.dimensions) + [col for col, _ in self.filters]
+        cols += [m.column for m in self.measures if m.column]
+        return cols
+
+
+def match_values(series: pd.Series, values: Iterable[str]) -> np.ndarray:
+    """
+    Boolean mask of rows whose value is one of `values`, compared by
+    `value_label` exactly as the bitmap index does (numbers by value).
+    """
+    numeric = numeric_labels(series.dtype)
+    wanted = {value_label(v, numeric) for v in values} - {None}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        hits = [i for i, cat in enumerate(series.cat.categories) if value_label(cat, numeric) in wanted]
+        return np.isin(np.asarray(series.array.codes), hits)
+    if numeric:
+        numbers = pd.to_numeric(pd.Series(list(wanted), dtype=object)).to_numpy()
+        return np.isin(series.to_numpy(), numbers)
+    return (series.astype(str).isin(wanted) & series.notna()).to_numpy()
+
+
+def filter_mask(df: pd.DataFrame, filters) -> Optional[np.ndarray]:
+    """
+    AND of the per-column filters (values within a column are OR-ed).
+    Served from the bitmap index when every filtered column is indexed.
+    """
+    if not filters:
+        return None
+    mask = indexed_mask(df, filters)
+    if mask is not None:
+        return mask
+
+    for col, values in filters:
+        col_mask = match_values(df[col], values)
+        mask = col_mask if mask is None else (mask & col_mask)
+    return mask
+
+
+def compute_cube(df: pd.DataFrame, query: CubeQuery) -> pd.DataFrame:
+    """Run `query` against `df` and return one row per dimension combination."""
+    missing = [c for c in query.columns() if c not in df.columns]
+    if missing:
+        raise CubeError(f"Unknown column(s): {', '.join(sorted(set(missing)))}")
+
+    mask = filter_mask(df, query.filters)
+    sub = df if mask is None else df[mask]
+
+    work = {dim: sub[dim] for dim in query.dimensions}
+    named_aggs = {}
+    for i, m in enumerate(query.measures):
+        if m.agg == "count":
+            work["__count"] = np.ones(len(sub), dtype=np.int64)
+            named_aggs[m.spec] = ("__count", "sum")
+        elif m.agg == "rate":
+            work[f"__m{i}"] = match_values(sub[m.column], [m.value]).astype(np.float64)
+            named_aggs[m.spec] = (f"__m{i}", "mean")
+        else:
+            work[f"__m{i}"] = pd.to_numeric(sub[m.column], errors="coerce").to_numpy()
+            named_aggs[m.spec] = (f"__m{i}", NUMERIC_AGGS[m.agg])
+    work = pd.DataFrame(work, index=sub.index)
+
+    if not query.dimensions:
+        row = {spec: work[col].agg(func) for spec, (col, func) in named_aggs.items()}
+        return pd.DataFrame([row])
+
+    return (
+        work.groupby(list(query.dimensions), observed=True, sort=True, dropna=True)
+        .agg(**named_aggs)
+        .reset_index()
+    )
+
+
+def cube_records(result: pd.DataFrame) -> List[Dict]:
+    """JSON-safe records with NaN mapped to None."""
+    out = result.astype(object).where(result.notna(), None)
+    return out.to_dict(orient="records")
+
+
+def cached_cube(df: pd.DataFrame, query: CubeQuery) -> Tuple[List[Dict], bool]:
+    """
+    Return (records, served_from_cache) for `query` over `df` at the current
+    data version. Entries are tied to the frame they were computed from, so
+    a frame rebuilt within one version (e.g. a changed CSV) is recomputed.
+    """
+    hit = [True]
+
+    def _build():
+        hit[0] = False
+        return weakref.ref(df), cube_records(compute_cube(df, query))
+
+    key = (id(df), query.key)
+    frame_ref, records = _cube_cache.get(key, _build)
+    if frame_ref() is not df:
+        # id() reused by a different frame: drop the stale entry
+        _cube_cache.discard(key)
+        frame_ref, records = _cube_cache.get(key, _build)
+    return records, hit[0]
+
+
+def warm_common_cuboids(df: pd.DataFrame) -> int:
+    """Precompute COMMON_CUBOIDS that apply to `df`; returns how many were built."""
+    built = 0
+    for dimensions, measures in COMMON_CUBOIDS:
+        try:
+            query = CubeQuery(dimensions, measures)
+            if all(c in df.columns for c in query.columns()):
+                cached_cube(df, query)
+                built += 1
+        except CubeError as e:
+            logger.warning(f"Skipping cuboid {dimensions}: {e}")
+    return built
@@ -0,0 +1,201 @@
+"""
+Dataset Version Stamps for ClientSphere API
+
+Every write path bumps a row in the ``data_versions`` table inside its own
+transaction. Readers call ``get_data_version()``, which re-reads that row at
+most once per ``DATA_VERSION_POLL_MS`` per process, so all gunicorn workers
+drop stale in-memory caches within a bounded delay without an external broker.
+The writing process clears its own caches once the transaction commits.
+"""
+
+import os
+import threading
+import time
+import logging
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import config
+from models import db, DataVersion
+from utils.circuit_breaker import db_breaker
+
+logger = logging.getLogger(__name__)
+
+CLIENTS_DATASET = "clients"
+
+_lock = threading.Lock()
+_observed = {}  # dataset name -> (version, monotonic time of last poll)
+_caches = weakref.WeakSet()
+_commit_hooks = []
+_PENDING_KEY = "bumped_datasets"
+
+
+def bump_data_version(name: str = CLIENTS_DATASET) -> None:
+    """
+    Increment the version stamp for `name` in the current session.
+
+    The caller owns the transaction; the new version becomes visible to other
+    workers when it commits. Caches in this process are cleared, and the
+    hooks registered with `on_version_committed` run, right after the commit.
+    """
+    if not _increment(name):
+        try:
+            with db.session.begin_nested():
+                db.session.add(DataVersion(name=name, version=1))
+        except IntegrityError:
+            # A concurrent first bump inserted the row; increment it instead
+            _increment(name)
+    db.session.info.setdefault(_PENDING_KEY, set()).add(name)
+
+
+def _increment(name: str) -> int:
+    return (
+        DataVersion.query.filter_by(name=name)
+        .update(
+            {DataVersion.version: DataVersion.version + 1, DataVersion.updated_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+
+
+def on_version_committed(hook: Callable[[str], None]) -> None:
+    """Call `hook(name)` after every commit that bumped dataset `name`."""
+    _commit_hooks.append(hook)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    for name in session.info.pop(_PENDING_KEY, ()):
+        with _lock:
+            _observed.pop(name, None)
+        for cache in list(_caches):
+            if cache.name == name:
+                cache.clear()
+        for hook in _commit_hooks:
+            try:
+                hook(name)
+            except Exception as e:
+                logger.warning(f"Data version hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def get_data_version(name: str = CLIENTS_DATASET, max_age_ms: Optional[int] = None) -> int:
+    """
+    Return the latest known version for `name`.
+
+    The database is consulted at most once per `max_age_ms` (defaults to
+    config.DATA_VERSION_POLL_MS). If it cannot be reached, or the database
+    circuit breaker is open, the last observed version is returned so cached
+    data keeps being served.
+    """
+    max_age = (config.DATA_VERSION_POLL_MS if max_age_ms is None else max_age_ms) / 1000.0
+    now = time.monotonic()
+    with _lock:
+        observed = _observed.get(name)
+    if observed is not None and now - observed[1] < max_age:
+        return observed[0]
+    if not has_app_context() or not db_breaker.allow():
+        return observed[0] if observed is not None else 0
+
+    try:
+        version = (
+            db.session.query(DataVersion.version)
+            .filter(DataVersion.name == name)
+            .scalar()
+        ) or 0
+        db_breaker.record_success()
+    except Exception as e:
+        db_breaker.record_failure()
+        logger.warning(f"Could not read data version for '{name}': {e}")
+        try:
+            db.session.rollback()
+        except Exception:
+            pass
+        version = observed[0] if observed is not None else 0
+
+    with _lock:
+        _observed[name] = (version, now)
+    return version
+
+
+def file_stamp(path: str) -> Optional[Tuple[str, int, int]]:
+    """Cheap change token for a file: (absolute path, mtime in ns, size)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+class VersionedCache:
+    """
+    Per-process memo that empties itself whenever the dataset version moves.
+
+    Values are computed outside the lock, so concurrent misses may build the
+    same entry twice; the result is identical and the last one wins.
+    """
+
+    def __init__(self, name: str = CLIENTS_DATASET, max_entries: int = 64):
+        self.name = name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+        _caches.add(self)
+
+    @property
+    def version(self) -> int:
+        return get_data_version(self.name)
+
+    def get(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, building it on a miss."""
+        version = get_data_version(self.name)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = builder()
+
+        with self._lock:
+            if self._version == version:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def get_for(self, obj: Any, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """
+        Like get(), but the entry belongs to `obj` (e.g. the frame it was
+        computed from): it is keyed by id(obj) and rebuilt if that id now
+        names a different object. Only a weak reference to `obj` is kept.
+        """
+        full_key = (id(obj), key)
+        ref, value = self.get(full_key, lambda: (weakref.ref(obj), builder()))
+        if ref() is not obj:
+            self.discard(full_key)
+            ref, value = self.get(full_key, lambda: (weakref.ref(obj), builder()))
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
@@ -0,0 +1,233 @@
+"""
+Memory-Mapped Dataset Snapshots for ClientSphere API
+
+A snapshot is a directory of ``.npy`` files, one per column, plus a
+``manifest.json``. Numeric columns are stored as-is; text columns are
+dictionary-encoded into integer codes with the categories kept in the
+manifest. Every gunicorn worker attaches the same files with
+``mmap_mode="r"``, so the operating system shares a single copy of the page
+cache instead of each process holding its own frame.
+
+Publishing writes the new snapshot to a hidden temp directory, renames it into
+place and then atomically replaces the ``CURRENT`` pointer file, so readers
+either see the previous snapshot or the complete new one.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+
+_lock = threading.Lock()
+_attached = {}  # dataset name -> DatasetSnapshot
+
+
+class DatasetSnapshot:
+    """A published snapshot attached as read-only, zero-copy column views."""
+
+    def __init__(self, name: str, manifest: dict, frame: pd.DataFrame):
+        self.name = name
+        self.manifest = manifest
+        self.frame = frame
+
+    @property
+    def version(self) -> int:
+        return self.manifest.get("version", 0)
+
+    @property
+    def source(self) -> str:
+        return self.manifest.get("source", "")
+
+    def __repr__(self):
+        return f"<DatasetSnapshot {self.name} rows={len(self.frame)}>"
+
+
+def plain_copy(frame: pd.DataFrame) -> pd.DataFrame:
+    """Writable copy of a snapshot frame with categoricals decoded to values."""
+    df = frame.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+def _dataset_dir(dataset: str) -> str:
+    path = os.path.join(config.SNAPSHOT_DIR, dataset)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _codes_dtype(n_categories: int):
+    # Same widths pandas picks for Categorical codes, so attaching never copies
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_column(series: pd.Series):
+    """Return (array, manifest entry) for one column."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = np.asarray(series.array.codes)
+        categories = series.cat.categories.tolist()
+        return codes.astype(_codes_dtype(len(categories)), copy=False), {
+            "kind": "categorical", "categories": categories,
+        }
+
+    if series.dtype.kind in "biufcmM":
+        return series.to_numpy(), {"kind": "numeric"}
+
+    if pd.api.types.is_extension_array_dtype(series.dtype) and pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan), {"kind": "numeric"}
+
+    values = series.map(
+        lambda v: json.dumps(v, default=str) if isinstance(v, (dict, list)) else v
+    )
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    categories = uniques.tolist()
+    return codes.astype(_codes_dtype(len(categories))), {
+        "kind": "categorical", "categories": categories,
+    }
+
+
+def _write_pointer(root: str, name: str) -> None:
+    tmp = os.path.join(root, f".{POINTER_FILE}.{os.getpid()}.{threading.get_ident()}")
+    with open(tmp, "w") as f:
+        f.write(name)
+    os.replace(tmp, os.path.join(root, POINTER_FILE))
+
+
+def _read_pointer(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, POINTER_FILE), "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _prune(root: str, current: str) -> None:
+    """Keep the current snapshot plus the newest SNAPSHOT_KEEP - 1 others."""
+    entries = []
+    for entry in os.scandir(root):
+        if not entry.is_dir() or entry.name == current:
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        # Temp directories belong to in-flight publishers; only reap abandoned ones
+        if entry.name.startswith("."):
+            if time.time() - mtime > 3600:
+                shutil.rmtree(entry.path, ignore_errors=True)
+            continue
+        entries.append((mtime, entry.path))
+
+    entries.sort(reverse=True)
+    for _, path in entries[max(config.SNAPSHOT_KEEP - 1, 0):]:
+        # Workers that still map old files keep their pages until they detach
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def publish_snapshot(df: pd.DataFrame, version: int, source: str = "",
+                     dataset: str = "clients") -> Optional[DatasetSnapshot]:
+    """
+    Write `df` as a new snapshot and make it the current one.
+
+    Returns the attached snapshot, or None when `df` is empty.
+    """
+    if df.empty:
+        return None
+
+    root = _dataset_dir(dataset)
+    name = f"v{version}-{uuid.uuid4().hex[:8]}"
+    tmp_dir = os.path.join(root, f".{name}.tmp")
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        array, entry = _encode_column(df[col])
+        entry.update({"name": col if isinstance(col, str) else str(col), "file": f"c{i}.npy"})
+        np.save(os.path.join(tmp_dir, entry["file"]), np.ascontiguousarray(array), allow_pickle=False)
+        columns.append(entry)
+
+    manifest = {
+        "name": name,
+        "dataset": dataset,
+        "version": int(version),
+        "source": source,
+        "rows": int(len(df)),
+        "columns": columns,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, default=str)
+
+    os.rename(tmp_dir, os.path.join(root, name))
+    _write_pointer(root, name)
+    logger.info(f"Published {dataset} snapshot {name} ({len(df)} rows)")
+
+    try:
+        _prune(root, name)
+    except OSError as e:
+        logger.warning(f"Snapshot pruning failed: {e}")
+    return attach_snapshot(dataset)
+
+
+def _load_snapshot(path: str, name: str) -> DatasetSnapshot:
+    with open(os.path.join(path, MANIFEST_FILE), "r") as f:
+        manifest = json.load(f)
+
+    data = {}
+    for entry in manifest["columns"]:
+        array = np.load(os.path.join(path, entry["file"]), mmap_mode="r", allow_pickle=False)
+        if entry["kind"] == "categorical":
+            values = pd.Categorical.from_codes(array, categories=pd.Index(entry["categories"]))
+            data[entry["name"]] = pd.Series(values, copy=False)
+        else:
+            data[entry["name"]] = pd.Series(array, copy=False)
+
+    frame = pd.DataFrame(data, copy=False)
+    return DatasetSnapshot(name, manifest, frame)
+
+
+def attach_snapshot(dataset: str = "clients") -> Optional[DatasetSnapshot]:
+    """
+    Return the currently published snapshot, attaching it if it changed.
+
+    The swap is atomic per process: requests already holding the previous
+    frame keep using it, new callers get the new one.
+    """
+    root = _dataset_dir(dataset)
+    name = _read_pointer(root)
+    if name is None:
+        return None
+
+    with _lock:
+        current = _attached.get(dataset)
+        if current is not None and current.name == name:
+            return current
+
+    try:
+        snapshot = _load_snapshot(os.path.join(root, name), name)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not attach {dataset} snapshot {name}: {e}")
+        return None
+
+    with _lock:
+        _attached[dataset] = snapshot
+    return snapshot
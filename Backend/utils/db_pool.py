@@ -0,0 +1,150 @@
+"""
+Database Connection Pool Tuning and Metrics for ClientSphere API
+
+Builds SQLALCHEMY_ENGINE_OPTIONS from config (pool size, overflow, pre-ping,
+recycle) and provides an instrumented QueuePool that records checkout wait
+times, overflow and timeouts so pool pressure is visible before it becomes a
+"MySQL server has gone away" or a stalled request.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+import config
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last is +Inf
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class PoolStats:
+    """Thread-safe counters for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        ms = seconds * 1000.0
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_sum_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            cumulative, histogram = 0, []
+            for bound, count in zip(WAIT_BUCKETS_MS + ["+Inf"], self.buckets):
+                cumulative += count
+                histogram.append({"le_ms": bound, "count": cumulative})
+            observed = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": (self.wait_sum_ms / observed) if observed else 0.0,
+                "wait_max_ms": self.wait_max_ms,
+                "wait_sum_ms": self.wait_sum_ms,
+                "wait_histogram": histogram,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including waits for a free slot."""
+
+    @property
+    def stats(self) -> PoolStats:
+        # Created lazily so recreate()/dispose() keep working unchanged
+        stats = self.__dict__.get("_clientsphere_stats")
+        if stats is None:
+            stats = self.__dict__.setdefault("_clientsphere_stats", PoolStats())
+        return stats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe_wait(time.perf_counter() - start)
+        return conn
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (url.rstrip("/") == "sqlite:" or ":memory:" in url)
+
+
+def build_engine_options(url: str = None) -> Dict:
+    """
+    Engine options for Flask-SQLAlchemy, driven by the DB_POOL_* settings
+    plus short driver connect/read timeouts for MySQL.
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool, since a
+    sized pool would give every connection its own empty database.
+    """
+    url = url or config.DATABASE_URL
+    if _is_memory_sqlite(url):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if url.startswith("mysql"):
+        # Fail fast when MySQL is unreachable instead of blocking on the OS default
+        options["connect_args"] = {
+            "connect_timeout": config.DB_CONNECT_TIMEOUT,
+            "read_timeout": config.DB_READ_TIMEOUT,
+            "write_timeout": config.DB_READ_TIMEOUT,
+        }
+    return options
+
+
+def pool_metrics(engine) -> Dict:
+    """Current occupancy plus cumulative checkout stats for `engine`'s pool."""
+    pool = engine.pool
+    metrics = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics.update(pool.stats.snapshot())
+    return metrics
+
+
+def prometheus_lines(name: str, metrics: Dict) -> List[str]:
+    """Render pool_metrics() output in the Prometheus text format."""
+    labels = f'pool="{name}"'
+    lines = []
+    for key in ("size", "checked_in", "checked_out", "overflow", "checkouts", "timeouts"):
+        if key in metrics:
+            lines.append(f"clientsphere_db_pool_{key}{{{labels}}} {metrics[key]}")
+    for bucket in metrics.get("wait_histogram", []):
+        le = bucket["le_ms"] if bucket["le_ms"] == "+Inf" else bucket["le_ms"] / 1000.0
+        lines.append(f'clientsphere_db_pool_wait_seconds_bucket{{{labels},le="{le}"}} {bucket["count"]}')
+    if "wait_sum_ms" in metrics:
+        lines.append(f"clientsphere_db_pool_wait_seconds_sum{{{labels}}} {metrics['wait_sum_ms'] / 1000.0}")
+        lines.append(
+            f"clientsphere_db_pool_wait_seconds_count{{{labels}}} {metrics['checkouts'] + metrics['timeouts']}"
+        )
+    return lines
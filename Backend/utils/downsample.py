@@ -0,0 +1,119 @@
+"""
+Representative Scatter Downsampling
+
+Reduces a scatter plot to a fixed point budget while keeping its look:
+
+* stratified by cluster: each cluster gets a share of the budget in
+  proportion to its size, and every cluster gets at least one point;
+* density-preserving within a cluster: the plot area is divided into a grid
+  and the cluster's quota is spread over the occupied cells in proportion
+  to their counts (stratified random sampling), so dense regions stay
+  proportionally dense. A small fixed share of the quota (COVERAGE_SHARE)
+  goes to one point each in cells that got none, so sparse regions and
+  outliers remain visible without outweighing the core.
+
+The budget and grid can be derived from the client's viewport size, so the
+payload stays roughly constant however large the dataset grows. Sampling
+is seeded, so a given data version always yields the same points.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+DEFAULT_POINTS = 1000
+MIN_POINTS = 50
+MAX_POINTS = 20000
+PIXELS_PER_POINT = 100   # about one point per 10x10 px of viewport
+CELL_PIXELS = 8          # grid cell size used for density coverage
+DEFAULT_GRID = 64
+COVERAGE_SHARE = 0.05    # share of each quota kept for otherwise empty cells
+
+
+def viewport_budget(width: Optional[int] = None, height: Optional[int] = None,
+                    points: Optional[int] = None) -> Tuple[int, int]:
+    """(point budget, grid cells per axis) for an explicit budget or a viewport in px."""
+    if points is not None:
+        return int(np.clip(points, MIN_POINTS, MAX_POINTS)), DEFAULT_GRID
+    if width and height:
+        budget = int(np.clip(width * height // PIXELS_PER_POINT, MIN_POINTS, MAX_POINTS))
+        grid = int(np.clip(max(width, height) // CELL_PIXELS, 8, 512))
+        return budget, grid
+    return DEFAULT_POINTS, DEFAULT_GRID
+
+
+def _grid_cells(x: np.ndarray, y: np.ndarray, grid: int) -> np.ndarray:
+    def _axis(v):
+        low, high = float(v.min()), float(v.max())
+        if high <= low:
+            return np.zeros(len(v), dtype=np.int64)
+        return np.minimum(((v - low) / (high - low) * grid).astype(np.int64), grid - 1)
+    return _axis(x) * grid + _axis(y)
+
+
+def _proportional(counts: np.ndarray, quota: int, rng: np.random.Generator) -> np.ndarray:
+    """Split `quota` over `counts` proportionally (largest remainder, random ties)."""
+    exact = counts * (quota / counts.sum())
+    alloc = np.floor(exact).astype(np.int64)
+    short = quota - int(alloc.sum())
+    if short > 0:
+        order = np.lexsort((rng.random(len(counts)), -(exact - alloc)))
+        alloc[order[:short]] += 1
+    return alloc
+
+
+def _cell_covering_sample(cells: np.ndarray, quota: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Positions (into `cells`) of `quota` rows, allocated to grid cells in
+    proportion to their counts, plus up to COVERAGE_SHARE of the quota as
+    one row each from cells the proportional share left empty.
+    """
+    n = len(cells)
+    if quota >= n:
+        return np.arange(n)
+    priority = rng.random(n)
+    order = np.lexsort((priority, cells))
+    sorted_cells = cells[order]
+    occupied, starts, counts = np.unique(sorted_cells, return_index=True, return_counts=True)
+
+    reserve = min(int(quota * COVERAGE_SHARE), len(occupied))
+    alloc = _proportional(counts, quota - reserve, rng)
+    uncovered = np.flatnonzero(alloc == 0)
+    alloc[rng.choice(uncovered, min(reserve, len(uncovered)), replace=False)] += 1
+
+    # Rows are in random order within each cell, so the first alloc[c] are a uniform draw
+    slot = np.repeat(np.arange(len(occupied)), counts)
+    rank = np.arange(n) - starts[slot]
+    chosen = order[rank < alloc[slot]]
+
+    left = quota - len(chosen)
+    if left > 0:
+        # Fewer empty cells than the reserve: the rest is uniform, i.e. proportional
+        remaining = np.setdiff1d(np.arange(n), chosen, assume_unique=True)
+        chosen = np.concatenate([chosen, rng.choice(remaining, left, replace=False)])
+    return chosen
+
+
+def stratified_sample(x: np.ndarray, y: np.ndarray, groups: np.ndarray, budget: int,
+                      grid: int = DEFAULT_GRID, seed: int = 0) -> np.ndarray:
+    """
+    Row positions of about `budget` points, stratified by the integer codes
+    in `groups` (-1 = no group, treated as its own stratum). Returned in
+    ascending row order.
+    """
+    n = len(x)
+    if n <= budget:
+        return np.arange(n)
+
+    rng = np.random.default_rng(seed)
+    cells = _grid_cells(x, y, grid)
+    strata, inverse, counts = np.unique(groups, return_inverse=True, return_counts=True)
+    quotas = np.maximum(np.floor(counts * budget / n).astype(int), 1)
+
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    picks = []
+    for start, count, quota in zip(starts, counts, quotas):
+        rows = order[start:start + count]
+        picks.append(rows[_cell_covering_sample(cells[rows], int(quota), rng)])
+    return np.sort(np.concatenate(picks))
@@ -0,0 +1,71 @@
+"""
+Embedded DuckDB Analytics Engine for ClientSphere API
+
+Optional SQL engine for the cluster summary in /segments/distribution.
+DuckDB scans the frame in place (pandas columns, including dictionary-encoded
+categoricals), and runs the query vectorized and multi-threaded. Select it
+with ANALYTICS_ENGINE=duckdb; when the package is not installed the endpoint
+keeps using pandas. The correlation, ANOVA and charts summary endpoints do
+not use it: they are served from incremental accumulators and single fused
+passes over the cached frame.
+"""
+
+import threading
+import logging
+from typing import Optional, Sequence
+
+import pandas as pd
+
+import config
+
+try:
+    import duckdb
+except Exception:  # keep server running if duckdb is missing
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_connection = None
+_local = threading.local()
+
+
+def use_duckdb() -> bool:
+    """True when config selects DuckDB and the package is importable."""
+    return config.ANALYTICS_ENGINE == "duckdb" and duckdb is not None
+
+
+def quote_ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _cursor():
+    """Per-thread cursor on one shared in-memory database."""
+    global _connection
+    cursor = getattr(_local, "cursor", None)
+    if cursor is not None:
+        return cursor
+    with _lock:
+        if _connection is None:
+            _connection = duckdb.connect(database=":memory:")
+            if config.DUCKDB_THREADS:
+                _connection.execute(f"SET threads TO {int(config.DUCKDB_THREADS)}")
+        cursor = _connection.cursor()
+    _local.cursor = cursor
+    return cursor
+
+
+def query_frame(df: pd.DataFrame, sql: str, params: Optional[Sequence] = None,
+                table: str = "clients") -> pd.DataFrame:
+    """
+    Run `sql` with `df` registered as `table` and return the result frame.
+
+    The frame is scanned in place rather than copied into DuckDB.
+    """
+    cursor = _cursor()
+    cursor.register(table, df)
+    try:
+        return cursor.execute(sql, params or []).df()
+    finally:
+        cursor.unregister(table)
+
@@ -0,0 +1,315 @@
+"""
+Background Feature-Importance Jobs for ClientSphere API
+
+Random-forest feature importance is too slow to compute on the request
+thread. Requests submit a job to a small worker pool, and the forest itself
+is fitted with n_jobs across cores. Each result is written to disk as JSON
+under a key derived from the dataset version and the hyperparameters, so
+repeated requests, and other worker processes, get the stored importances
+back instantly. The store keeps the newest FEATURE_RESULTS_KEEP results and
+drops any older than FEATURE_RESULTS_MAX_AGE seconds; a pruned result is
+simply recomputed on the next request.
+
+The job id is that same key: identical requests share one job.
+
+For exploratory use a job can fit on a stratified subsample instead
+(`sample_size`). It can also fit several bootstrap subsamples in parallel
+(`bootstraps`, or as many as fit in `time_budget` seconds). Importances then
+come with confidence intervals: percentile intervals across bootstrap
+replicates, or for a single sample, a normal interval from the spread of the
+per-tree importances. Either way at least MIN_REPLICATES replicates (trees
+for a single sample) back an interval, so `time_budget` is a soft limit.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import config
+
+logger = logging.getLogger(__name__)
+
+FOREST_PARAMS = {"n_estimators": 200, "max_depth": None, "random_state": 42}
+SAMPLING_PARAMS = {"sample_size": None, "bootstraps": None, "time_budget": None, "confidence": 0.95}
+DEFAULT_PARAMS = {**FOREST_PARAMS, **SAMPLING_PARAMS}
+MAX_ESTIMATORS = 2000
+MAX_BOOTSTRAPS = 64
+MIN_REPLICATES = 20
+DEFAULT_SAMPLE_SIZE = 10000
+
+_lock = threading.Lock()
+_executor = None
+_jobs: Dict[str, Dict[str, Any]] = {}
+
+
+class JobParamsError(ValueError):
+    """Raised for invalid feature-importance hyperparameters."""
+
+
+def normalize_params(raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Validate hyperparameters and sampling options and fill in defaults."""
+    params = dict(DEFAULT_PARAMS)
+    for name, value in (raw or {}).items():
+        if name not in DEFAULT_PARAMS:
+            continue
+        if value is None and DEFAULT_PARAMS[name] is None:
+            params[name] = None
+            continue
+        cast = float if name in ("time_budget", "confidence") else int
+        try:
+            params[name] = cast(value)
+        except (TypeError, ValueError):
+            kind = "a number" if cast is float else "an integer"
+            raise JobParamsError(f"{name} must be {kind}")
+    if not 1 <= params["n_estimators"] <= MAX_ESTIMATORS:
+        raise JobParamsError(f"n_estimators must be between 1 and {MAX_ESTIMATORS}")
+    if params["max_depth"] is not None and params["max_depth"] < 1:
+        raise JobParamsError("max_depth must be positive")
+    if params["sample_size"] is not None and params["sample_size"] < 2:
+        raise JobParamsError("sample_size must be at least 2")
+    if params["bootstraps"] is not None and not MIN_REPLICATES <= params["bootstraps"] <= MAX_BOOTSTRAPS:
+        raise JobParamsError(f"bootstraps must be between {MIN_REPLICATES} and {MAX_BOOTSTRAPS}")
+    if params["time_budget"] is not None and params["time_budget"] <= 0:
+        raise JobParamsError("time_budget must be positive")
+    if not 0 < params["confidence"] < 1:
+        raise JobParamsError("confidence must be between 0 and 1")
+    single_sample = params["sample_size"] is not None and not (params["bootstraps"] or params["time_budget"])
+    if single_sample and params["n_estimators"] < MIN_REPLICATES:
+        raise JobParamsError(f"n_estimators must be at least {MIN_REPLICATES} for a sampled confidence interval")
+    return params
+
+
+def is_sampled(params: Dict[str, Any]) -> bool:
+    return any(params[name] is not None for name in ("sample_size", "bootstraps", "time_budget"))
+
+
+def job_key(source: Any, params: Dict[str, Any]) -> str:
+    payload = json.dumps({"source": source, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def _result_path(key: str) -> str:
+    return os.path.join(config.FEATURE_RESULTS_DIR, f"{key}.json")
+
+
+def load_result(key: str) -> Optional[Dict[str, Any]]:
+    """Stored result for `key`, or None (also once it is past FEATURE_RESULTS_MAX_AGE)."""
+    path = _result_path(key)
+    try:
+        if config.FEATURE_RESULTS_MAX_AGE > 0 and time.time() - os.path.getmtime(path) > config.FEATURE_RESULTS_MAX_AGE:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_result(key: str, result: Dict[str, Any]) -> None:
+    os.makedirs(config.FEATURE_RESULTS_DIR, exist_ok=True)
+    path = _result_path(key)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp, path)
+    _prune_results()
+
+
+def _prune_results() -> None:
+    """Drop results older than FEATURE_RESULTS_MAX_AGE, then all but the newest FEATURE_RESULTS_KEEP."""
+    now = time.time()
+    entries = []
+    for entry in os.scandir(config.FEATURE_RESULTS_DIR):
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        expired = config.FEATURE_RESULTS_MAX_AGE > 0 and now - mtime > config.FEATURE_RESULTS_MAX_AGE
+        if entry.name.endswith(".tmp"):
+            # Temp files belong to in-flight writers; only reap abandoned ones
+            if now - mtime > 3600:
+                _remove(entry.path)
+        elif entry.name.endswith(".json"):
+            if expired:
+                _remove(entry.path)
+            else:
+                entries.append((mtime, entry.path))
+
+    entries.sort(reverse=True)
+    for _, path in entries[max(config.FEATURE_RESULTS_KEEP, 1):]:
+        _remove(path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(config.FEATURE_JOB_WORKERS, 1),
+                                       thread_name_prefix="feature-job")
+    return _executor
+
+
+def stratified_sample(y: np.ndarray, size: int, rng: np.random.Generator,
+                      replace: bool = False) -> np.ndarray:
+    """
+    Row positions of a sample of about `size` rows with each class of `y`
+    represented in proportion (at least one row per class).
+    """
+    classes, inverse, counts = np.unique(y, return_inverse=True, return_counts=True)
+    quotas = np.maximum(np.round(counts * size / len(y)).astype(int), 1)
+    if not replace:
+        quotas = np.minimum(quotas, counts)
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    picks = [
+        order[start + rng.choice(count, quota, replace=replace)]
+        for start, count, quota in zip(starts, counts, quotas)
+    ]
+    return np.concatenate(picks)
+
+
+def _fit_forest(X: np.ndarray, y: np.ndarray, params: Dict[str, Any], n_jobs: int, seed: int):
+    from sklearn.ensemble import RandomForestClassifier
+
+    forest_params = {name: params[name] for name in FOREST_PARAMS}
+    forest_params["random_state"] = seed
+    clf = RandomForestClassifier(n_jobs=n_jobs, **forest_params)
+    clf.fit(X, y)
+    return clf
+
+
+def _bootstrap_importances(X: np.ndarray, y: np.ndarray, params: Dict[str, Any], size: int) -> np.ndarray:
+    """
+    Fit forests on stratified bootstrap resamples in parallel, one core each.
+    Runs `bootstraps` replicates, or as many as fit in `time_budget`.
+    """
+    replicates = params["bootstraps"] or MAX_BOOTSTRAPS
+    deadline = time.monotonic() + params["time_budget"] if params["time_budget"] else None
+    workers = max(min(os.cpu_count() or 1, replicates), 1)
+    seed = params["random_state"]
+
+    def _replicate(i):
+        rows = stratified_sample(y, size, np.random.default_rng(seed + i), replace=True)
+        return _fit_forest(X[rows], y[rows], params, n_jobs=1, seed=seed + i).feature_importances_
+
+    results: List[np.ndarray] = []
+    submitted = 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feature-bootstrap") as pool:
+        while True:
+            in_time = deadline is None or time.monotonic() < deadline or submitted < MIN_REPLICATES
+            while submitted < replicates and len(pending) < workers and in_time:
+                pending.add(pool.submit(_replicate, submitted))
+                submitted += 1
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            results.extend(f.result() for f in done)
+    return np.vstack(results)
+
+
+def compute_importance(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit the random forest on `df` and return features and importances."""
+    from preprocessing import prepare_features, build_numeric_preprocess_pipeline
+
+    drop_columns = ["cluster_label", "client_id"] if "client_id" in df.columns else ["cluster_label"]
+    X, feature_columns = prepare_features(df, drop_columns=drop_columns)
+    y = df["cluster_label"].astype(str).values
+    X_transformed = build_numeric_preprocess_pipeline().fit_transform(X)
+
+    if not is_sampled(params):
+        clf = _fit_forest(X_transformed, y, params, config.FEATURE_JOB_N_JOBS, params["random_state"])
+        return {"features": feature_columns, "importances": clf.feature_importances_.tolist(), "method": "full"}
+
+    size = min(params["sample_size"] or DEFAULT_SAMPLE_SIZE, len(y))
+    alpha = 1.0 - params["confidence"]
+    if params["bootstraps"] or params["time_budget"]:
+        replicates = _bootstrap_importances(X_transformed, y, params, size)
+        importances = replicates.mean(axis=0)
+        lower, upper = np.percentile(replicates, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+        method, n_fits = "bootstrap", len(replicates)
+    else:
+        rows = stratified_sample(y, size, np.random.default_rng(params["random_state"]))
+        clf = _fit_forest(X_transformed[rows], y[rows], params, config.FEATURE_JOB_N_JOBS, params["random_state"])
+        importances = clf.feature_importances_
+        per_tree = np.vstack([tree.feature_importances_ for tree in clf.estimators_])
+        half_width = stats.norm.ppf(1 - alpha / 2) * per_tree.std(axis=0, ddof=1) / np.sqrt(len(per_tree))
+        lower, upper = importances - half_width, importances + half_width
+        method, n_fits = "sample", 1
+
+    return {
+        "features": feature_columns,
+        "importances": importances.tolist(),
+        "ci_lower": np.clip(np.nan_to_num(lower), 0.0, None).tolist(),
+        "ci_upper": np.nan_to_num(upper).tolist(),
+        "confidence": params["confidence"],
+        "method": method,
+        "sample_size": int(size),
+        "replicates": n_fits,
+    }
+
+
+def _run(key: str, load_frame: Callable[[], pd.DataFrame], params: Dict[str, Any]) -> None:
+    job = _jobs[key]
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    try:
+        result = compute_importance(load_frame(), params)
+        result["params"] = params
+        _store_result(key, result)
+        job["result"] = result
+        job["status"] = "done"
+        with _lock:
+            _jobs.pop(key, None)  # served from the result store from now on
+    except Exception as e:
+        logger.exception(f"Feature-importance job {key} failed")
+        job["error"] = str(e)
+        job["status"] = "failed"
+    finally:
+        job["finished_at"] = time.time()
+
+
+def submit_job(load_frame: Callable[[], pd.DataFrame], source: Any,
+               params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the job for (`source`, `params`): a finished one if its result is
+    stored, the in-flight one if already submitted, otherwise a new one.
+    """
+    key = job_key(source, params)
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and job["status"] != "failed":
+            return job
+        stored = load_result(key)
+        if stored is not None:
+            return {"job_id": key, "status": "done", "params": params, "result": stored}
+
+        job = {"job_id": key, "status": "queued", "params": params, "submitted_at": time.time()}
+        _jobs[key] = job
+        _get_executor().submit(_run, key, load_frame, params)
+        return job
+
+
+def get_job(key: str) -> Optional[Dict[str, Any]]:
+    """Job state by id; falls back to the result store for jobs run elsewhere."""
+    job = _jobs.get(key)
+    if job is not None:
+        return job
+    stored = load_result(key)
+    if stored is not None:
+        return {"job_id": key, "status": "done", "params": stored.get("params"), "result": stored}
+    return None
@@ -0,0 +1,153 @@
+"""
+Vectorized Histograms for ClientSphere API
+
+Bin edges are linear, logarithmic, quantile-based or given explicitly. Values
+are assigned to bins with one np.searchsorted call and counted with
+np.bincount. For per-group histograms the group code and the bin index are
+combined into a single bincount. Column arrays and results are cached per
+dataset version and frame (weakref-checked, as in utils.bitmap_index).
+
+Bins are right-closed with the first bin also including its lower edge
+(the pd.cut(..., right=True, include_lowest=True) convention).
+"""
+
+import weakref
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.data_version import VersionedCache
+
+BIN_SCALES = ("linear", "log", "quantile")
+MAX_BINS = 500
+MAX_GROUPS = 50  # `by` columns with more distinct values are rejected
+
+_hist_cache = VersionedCache(max_entries=128)
+
+
+class HistogramError(ValueError):
+    """Raised for histogram requests that cannot be binned."""
+
+
+def _frame_cached(df: pd.DataFrame, key: tuple, build: Callable):
+    """Cache `build()` for `df`; entries of a dead frame whose id was reused are rebuilt."""
+    full_key = (id(df),) + key
+    frame_ref, value = _hist_cache.get(full_key, lambda: (weakref.ref(df), build()))
+    if frame_ref() is not df:
+        _hist_cache.discard(full_key)
+        frame_ref, value = _hist_cache.get(full_key, lambda: (weakref.ref(df), build()))
+    return value
+
+
+def column_values(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Float array for `column` (non-numeric -> NaN), cached per data version."""
+    if column not in df.columns:
+        raise HistogramError(f"Unknown column '{column}'")
+    return _frame_cached(
+        df, ("values", column),
+        lambda: pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan),
+    )
+
+
+def bin_edges(values: np.ndarray, bins: int, scale: str = "linear") -> np.ndarray:
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        raise HistogramError("Column has no numeric values")
+    low, high = float(finite.min()), float(finite.max())
+
+    if scale == "log":
+        positive = finite[finite > 0]
+        if not len(positive):
+            raise HistogramError("Log bins need positive values")
+        low = float(positive.min())
+        edges = np.geomspace(low, high, bins + 1) if high > low else np.array([low, low * 10])
+    elif scale == "quantile":
+        edges = np.unique(np.quantile(finite, np.linspace(0.0, 1.0, bins + 1)))
+    else:
+        edges = np.linspace(low, high, bins + 1)
+    if len(edges) < 2 or edges[-1] <= edges[0]:
+        edges = np.array([low, low + 1.0])
+    return edges
+
+
+def clip_edges(edges: Sequence[float], top: float) -> np.ndarray:
+    """
+    Fixed edges truncated so the last edge is `top`: edges at or above it are
+    dropped. This keeps hard-coded bucket lists monotonic for small data.
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    top = max(float(top), float(edges[1])) if len(edges) > 1 else float(top)
+    kept = edges[edges < top]
+    return np.append(kept, top)
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray, groups: Optional[np.ndarray] = None,
+               n_groups: int = 0) -> np.ndarray:
+    """
+    Counts per bin, or a (n_groups, n_bins) matrix when `groups` holds
+    integer group codes (-1 = no group).
+    """
+    n_bins = len(edges) - 1
+    idx = np.searchsorted(edges, values, side="left") - 1
+    idx[values == edges[0]] = 0
+    valid = (idx >= 0) & (idx < n_bins) & ~np.isnan(values)
+    if groups is None:
+        return np.bincount(idx[valid], minlength=n_bins)
+    valid &= groups >= 0
+    flat = np.bincount(groups[valid] * n_bins + idx[valid], minlength=n_groups * n_bins)
+    return flat.reshape(n_groups, n_bins)
+
+
+def histogram(df: pd.DataFrame, column: str, bins: int = 20, scale: str = "linear",
+              edges: Optional[Sequence[float]] = None, by: Optional[str] = None) -> Dict:
+    """
+    Histogram of `column`, optionally one per value of `by` (at most
+    MAX_GROUPS distinct values), cached per data version.
+    """
+    if scale not in BIN_SCALES:
+        raise HistogramError(f"scale must be one of: {', '.join(BIN_SCALES)}")
+    if not 1 <= bins <= MAX_BINS:
+        raise HistogramError(f"bins must be between 1 and {MAX_BINS}")
+    if by is not None and by not in df.columns:
+        raise HistogramError(f"Unknown column '{by}'")
+    edges_key = tuple(edges) if edges is not None else None
+
+    def _build():
+        values = column_values(df, column)
+        if edges is not None:
+            edges_array = np.asarray(edges, dtype=np.float64)
+            if not np.isfinite(edges_array).all():
+                raise HistogramError("edges must be finite numbers")
+            if len(edges_array) < 2 or np.any(np.diff(edges_array) <= 0):
+                raise HistogramError("edges must be strictly increasing")
+        else:
+            edges_array = bin_edges(values, bins, scale)
+
+        result = {"column": column, "scale": scale if edges is None else "explicit",
+                  "edges": edges_array.tolist()}
+        if by is None:
+            result["counts"] = bin_counts(values, edges_array).tolist()
+            return result
+
+        codes, uniques = pd.factorize(df[by], use_na_sentinel=True)
+        if len(uniques) > MAX_GROUPS:
+            raise HistogramError(f"'{by}' has {len(uniques)} distinct values; group by a column with at most {MAX_GROUPS}")
+        matrix = bin_counts(values, edges_array, codes, len(uniques))
+        labels = [u.item() if hasattr(u, "item") else u for u in uniques]
+        order = sorted(range(len(labels)), key=lambda i: (isinstance(labels[i], str), labels[i]))
+        result["by"] = by
+        result["groups"] = [{"group": labels[i], "counts": matrix[i].tolist()} for i in order]
+        return result
+
+    return _frame_cached(df, ("hist", column, bins, scale, edges_key, by), _build)
+
+
+def labelled_counts(values: np.ndarray, edges: Sequence[float], labels: List[str],
+                    key: str = "label") -> List[Dict]:
+    """Counts for fixed, labelled buckets; labels beyond the clipped edges are dropped."""
+    finite = values[np.isfinite(values)]
+    top = float(finite.max()) if len(finite) else float(edges[-1])
+    clipped = clip_edges(edges, top)
+    counts = bin_counts(values, clipped)
+    return [{key: label, "count": int(n)} for label, n in zip(labels, counts)]
@@ -0,0 +1,137 @@
+"""
+Compact Plotly Figure Specs
+
+Builds the interactive scatter charts as Plotly figure JSON that plotly.js
+can render directly, instead of a standalone HTML page. Numeric trace arrays
+use plotly.js typed-array encoding ({"dtype": "f8", "bdata": <base64>}) in
+the narrowest dtype that holds them exactly, and the layout template only
+keeps defaults for the trace types in use, so a figure is a fraction of the
+size of the HTML export. Serialized figures are built by the chart
+regeneration job when the data version changes and cached per version and
+source frame; a request only builds them if it arrives before the job has
+run.
+"""
+
+import json
+import base64
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.data_version import VersionedCache
+from utils.chart_jobs import chart_inputs
+from utils.dataset_snapshot import plain_copy
+from utils.chart_render import px
+
+_figure_cache = VersionedCache(max_entries=16)
+
+INT_DTYPES = (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32)
+
+
+def _narrow_int(values: np.ndarray) -> np.ndarray:
+    if not len(values):
+        return values.astype(np.int8)
+    low, high = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values.astype(np.float64)
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    """
+    Smallest dtype plotly.js can decode that holds `values` exactly:
+    integers (and integral floats without NaN) as the narrowest int type,
+    other floats as f4 when that round-trips, else f8.
+    """
+    if values.dtype.kind == "b":
+        return values.astype(np.uint8)
+    if values.dtype.kind in "iu":
+        return _narrow_int(values)
+    values = values.astype(np.float64, copy=False)
+    if np.isfinite(values).all() and np.array_equal(values, np.round(values)) \
+            and (not len(values) or np.abs(values).max() <= np.iinfo(np.int32).max):
+        return _narrow_int(values.astype(np.int64))
+    single = values.astype(np.float32)
+    if np.array_equal(single.astype(np.float64), values, equal_nan=True):
+        return single
+    return values
+
+
+def encode_typed_array(values: np.ndarray) -> Dict[str, Any]:
+    values = _narrow(values)
+    # plotly.js decodes little-endian data; dtype.str is e.g. "<f8" or "|u1"
+    values = np.ascontiguousarray(values.astype(values.dtype.newbyteorder("<"), copy=False))
+    encoded = {"dtype": values.dtype.str[1:],
+               "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+    if values.ndim > 1:
+        encoded["shape"] = ",".join(str(n) for n in values.shape)
+    return encoded
+
+
+def decode_typed_array(spec: Dict[str, Any]) -> np.ndarray:
+    values = np.frombuffer(base64.b64decode(spec["bdata"]), dtype=np.dtype(spec["dtype"]).newbyteorder("<"))
+    if "shape" in spec:
+        values = values.reshape([int(n) for n in str(spec["shape"]).split(",")])
+    return values
+
+
+def encode_arrays(obj: Any) -> Any:
+    """Replace numeric numpy arrays in a figure dict with typed-array specs."""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "iufb":
+            return encode_typed_array(obj)
+        return [encode_arrays(v) for v in obj.tolist()]
+    if isinstance(obj, dict):
+        if "bdata" in obj and "dtype" in obj:
+            # Newer plotly versions hand back arrays already encoded as f8/i8
+            return encode_typed_array(decode_typed_array(obj))
+        return {k: encode_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [encode_arrays(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def figure_spec(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """{"data", "layout"} for one plotly_scatter chart's inputs."""
+    fig = px.scatter(pd.DataFrame(inputs["columns"]), **inputs["figure"])
+    spec = fig.to_plotly_json()
+    # The template carries defaults for every trace type; keep only the ones in use
+    template = spec["layout"].get("template")
+    if isinstance(template, dict) and "data" in template:
+        used = {trace.get("type", "scatter") for trace in spec["data"]}
+        template["data"] = {kind: v for kind, v in template["data"].items() if kind in used}
+    return encode_arrays(spec)
+
+
+def _serialize(name: str, spec: Dict[str, Any]) -> bytes:
+    body = json.dumps({"chart": name, "figure": spec}, separators=(",", ":"), allow_nan=False,
+                      default=str)
+    return body.encode("utf-8")
+
+
+def build_figures(df) -> Dict[str, bytes]:
+    """Serialized figure payload per interactive chart name."""
+    if px is None or df.empty:
+        return {}
+    return {name: _serialize(name, figure_spec(chart["inputs"]))
+            for name, chart in chart_inputs(df).items() if chart["kind"] == "plotly_scatter"}
+
+
+def warm_figures(frame) -> Dict[str, bytes]:
+    """Build and cache every figure for the shared `frame`; called by the chart regeneration job."""
+    return _figure_cache.get_for(frame, "figures", lambda: build_figures(plain_copy(frame)))
+
+
+def cached_figure(name: str, frame) -> Optional[bytes]:
+    """
+    Serialized figure for `name` drawn from the shared `frame` (as returned
+    by get_clients_frame), or None when the chart cannot be drawn from it.
+    Figures are cached per data version and frame, so figures built from an
+    outage fallback are not served once the database frame is back.
+    """
+    return warm_figures(frame).get(name)
@@ -0,0 +1,238 @@
+"""
+Mergeable Quantile Sketches for Per-Cluster Distributions
+
+A KLL sketch keeps a stack of compactors. Level h holds items that each
+stand for 2**h original values. When a level fills up, it is sorted and
+every other item (random offset) is promoted to the next level. Memory stays
+around 3k items regardless of the input size, the rank error is on the order
+of 1/k, and two sketches merge by concatenating their levels. Up to
+EXACT_LIMIT values nothing is compacted, so for small groups the quantiles
+are exact and interpolated the same way pandas does.
+
+ClusterSketches keeps one sketch per (cluster, numeric column) of the client
+frame. It is updated at ingest: appended rows are fed into copies of the
+existing sketches, and anything else triggers a rebuild. Published sketches
+are never modified, and they are kept per frame, so a request holding the
+previous frame keeps reading consistent sketches. Boxplots, medians and
+percentiles are then read from the sketches without sorting the data.
+"""
+
+import copy
+import math
+import random
+import threading
+import logging
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_K = 200
+EXACT_LIMIT = 4096  # values kept verbatim (exact quantiles) before compacting
+BOXPLOT_QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+MAX_SKETCH_SETS = 4
+
+_lock = threading.Lock()
+_current = None  # ClusterSketches for the most recent frame
+_by_frame: "OrderedDict[int, ClusterSketches]" = OrderedDict()  # id(frame) -> sketches
+
+
+class KLLSketch:
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None, exact_limit: int = EXACT_LIMIT):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.compactors: List[np.ndarray] = [np.empty(0)]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(int(math.ceil(self.k * (2.0 / 3.0) ** depth)), 2)
+
+    def _compress(self) -> None:
+        if len(self.compactors) == 1 and len(self.compactors[0]) <= max(self.exact_limit, self.k):
+            return
+        while sum(len(c) for c in self.compactors) > sum(self._capacity(h) for h in range(len(self.compactors))):
+            for h, items in enumerate(self.compactors):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.randint(0, 1)::2]
+                self.compactors[h] = keep
+                self.compactors[h + 1] = np.concatenate([self.compactors[h + 1], promoted])
+                break
+
+    def update(self, values: Iterable[float]) -> None:
+        """Add a batch of values; NaN is ignored."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold `other` into this sketch (in place) and return self."""
+        if other.n == 0:
+            return self
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for h, items in enumerate(other.compactors):
+            self.compactors[h] = np.concatenate([self.compactors[h], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def copy(self) -> "KLLSketch":
+        sketch = KLLSketch(self.k, exact_limit=self.exact_limit)
+        sketch.n, sketch.min, sketch.max = self.n, self.min, self.max
+        sketch.compactors = [c.copy() for c in self.compactors]
+        sketch._rng.setstate(self._rng.getstate())
+        return sketch
+
+    @property
+    def exact(self) -> bool:
+        return len(self.compactors) == 1
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        qs = np.clip(np.asarray(list(qs), dtype=np.float64), 0.0, 1.0)
+        if self.n == 0:
+            return [None] * len(qs)
+        if self.exact:
+            return [float(v) for v in np.quantile(self.compactors[0], qs)]
+
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(c), 2.0 ** h) for h, c in enumerate(self.compactors)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        values = items[np.minimum(idx, len(items) - 1)]
+        values = np.where(qs <= 0.0, self.min, np.where(qs >= 1.0, self.max, values))
+        return [float(v) for v in values]
+
+
+def _python_value(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def _sort_key(value):
+    return (0, value, "") if isinstance(value, (int, float)) else (1, 0, str(value))
+
+
+class ClusterSketches:
+    """One KLL sketch per (cluster, column) over a client frame."""
+
+    def __init__(self, df: pd.DataFrame, group_col: str = "cluster_label", k: int = DEFAULT_K):
+        self.group_col = group_col
+        self.k = k
+        self.columns = [
+            c for c in df.select_dtypes(include=[np.number]).columns if c not in (group_col, "client_id")
+        ]
+        self.sketches: Dict[object, Dict[str, KLLSketch]] = {}
+        self.n_rows = 0
+        self._frame = weakref.ref(df)
+        self._hashes = np.empty(0, dtype=np.uint64)
+        if group_col in df.columns:
+            self._add_rows(df)
+
+    def _row_hashes(self, df: pd.DataFrame) -> np.ndarray:
+        return pd.util.hash_pandas_object(df[[self.group_col] + self.columns], index=False).to_numpy()
+
+    def _add_rows(self, df: pd.DataFrame) -> None:
+        codes, uniques = pd.factorize(df[self.group_col], use_na_sentinel=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for col in self.columns:
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            for code, label in enumerate(uniques):
+                per_cluster = self.sketches.setdefault(_python_value(label), {})
+                sketch = per_cluster.setdefault(col, KLLSketch(self.k, seed=code))
+                sketch.update(values[order[bounds[code]:bounds[code + 1]]])
+        self.n_rows += len(df)
+        self._hashes = np.concatenate([self._hashes, self._row_hashes(df)])
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        return self._frame() is df
+
+    def extended(self, df: pd.DataFrame) -> Optional["ClusterSketches"]:
+        """
+        New sketches for `df` with the rows appended since this frame fed into
+        copies of these sketches (which are left untouched); None if a
+        rebuild is needed.
+        """
+        if self.group_col not in df.columns or len(df) < self.n_rows:
+            return None
+        columns = [c for c in df.select_dtypes(include=[np.number]).columns if c not in (self.group_col, "client_id")]
+        if columns != self.columns:
+            return None
+        if not np.array_equal(self._row_hashes(df.iloc[:self.n_rows]), self._hashes):
+            return None
+
+        sketches = copy.copy(self)
+        sketches.sketches = {cluster: {col: sketch.copy() for col, sketch in per_cluster.items()}
+                             for cluster, per_cluster in self.sketches.items()}
+        appended = len(df) - self.n_rows
+        if appended:
+            sketches._add_rows(df.iloc[self.n_rows:])
+        sketches._frame = weakref.ref(df)
+        logger.info(f"Cluster sketches extended with {appended} rows")
+        return sketches
+
+    def clusters(self) -> List:
+        return sorted(self.sketches, key=_sort_key)
+
+    def sketch(self, column: str, cluster=None) -> Optional[KLLSketch]:
+        """Sketch for one cluster, or all clusters merged when `cluster` is None."""
+        if column not in self.columns:
+            return None
+        if cluster is not None:
+            return self.sketches.get(cluster, {}).get(column)
+        merged = KLLSketch(self.k)
+        for per_cluster in self.sketches.values():
+            if column in per_cluster:
+                merged.merge(per_cluster[column].copy())
+        return merged
+
+    def boxplot(self, column: str) -> List[Dict]:
+        """Five-number summary per cluster, in cluster order."""
+        rows = []
+        for cluster in self.clusters():
+            sketch = self.sketches[cluster].get(column)
+            if sketch is None or sketch.n == 0:
+                continue
+            low, q1, median, q3, high = sketch.quantiles(BOXPLOT_QUANTILES)
+            rows.append({"cluster": cluster, "min": low, "q1": q1, "median": median, "q3": q3, "max": high})
+        return rows
+
+
+def get_cluster_sketches(df: pd.DataFrame) -> ClusterSketches:
+    """Sketches for `df`, extended incrementally from the latest frame's."""
+    global _current
+    with _lock:
+        sketches = _by_frame.get(id(df))
+        if sketches is not None and sketches.covers(df):
+            _by_frame.move_to_end(id(df))
+            return sketches
+        sketches = _current.extended(df) if _current is not None else None
+        if sketches is None:
+            sketches = ClusterSketches(df)
+        _by_frame[id(df)] = sketches
+        while len(_by_frame) > MAX_SKETCH_SETS:
+            _by_frame.popitem(last=False)
+        _current = sketches
+        return sketches
@@ -0,0 +1,114 @@
+"""
+Read-Replica Routing for ClientSphere API
+
+Heavy analytics reads (GET graph, dashboard and cluster endpoints) can be sent
+to a read-only replica configured as the ``replica`` SQLAlchemy bind. Logins,
+uploads and anything else that writes keep using the primary through
+``db.session``.
+
+A read only goes to the replica when it is reachable and has caught up with
+the data version the caller needs. Readers compare the replica's
+``data_versions`` row with the primary's. Because a writer bumps that row in
+the same transaction, this also gives read-your-writes. If the replica lags,
+errors or has its own circuit breaker open, the read silently falls back to
+the primary.
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Callable, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+import config
+from models import db, DataVersion
+from utils.circuit_breaker import CircuitBreaker
+from utils.data_version import CLIENTS_DATASET, get_data_version
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = "replica"
+
+replica_breaker = CircuitBreaker("replica", config.DB_BREAKER_FAILURES, config.DB_BREAKER_RESET_SECONDS)
+
+_lock = threading.Lock()
+_replica_seen = {}  # dataset name -> (replica version, monotonic time of last poll)
+
+
+def replica_engine():
+    """The replica engine, or None when no DATABASE_REPLICA_URL is configured."""
+    if REPLICA_BIND not in current_app.config.get("SQLALCHEMY_BINDS", {}):
+        return None
+    return db.engines[REPLICA_BIND]
+
+
+def replica_version(name: str = CLIENTS_DATASET) -> Optional[int]:
+    """
+    Data version the replica has applied, polled at most once per
+    DATA_VERSION_POLL_MS. Returns None if the replica is unreachable.
+    """
+    engine = replica_engine()
+    if engine is None:
+        return None
+
+    now = time.monotonic()
+    with _lock:
+        seen = _replica_seen.get(name)
+    if seen is not None and now - seen[1] < config.DATA_VERSION_POLL_MS / 1000.0:
+        return seen[0]
+    if not replica_breaker.allow():
+        return None
+
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(
+                select(DataVersion.version).where(DataVersion.name == name)
+            ).scalar() or 0
+        replica_breaker.record_success()
+    except Exception as e:
+        replica_breaker.record_failure()
+        logger.warning(f"Replica version check failed: {e}")
+        return None
+
+    with _lock:
+        _replica_seen[name] = (version, now)
+    return version
+
+
+def choose_read_engine(min_version: Optional[int] = None, name: str = CLIENTS_DATASET) -> Tuple[Any, str]:
+    """
+    Return (engine, "replica" | "primary") for an analytics read that needs
+    at least `min_version` of dataset `name` (default: the primary's current
+    version).
+    """
+    if replica_engine() is None:
+        return db.engine, "primary"
+
+    if min_version is None:
+        min_version = get_data_version(name)
+    seen = replica_version(name)
+    if seen is None or seen < min_version:
+        return db.engine, "primary"
+    return replica_engine(), "replica"
+
+
+def analytics_read(fn: Callable[[Any], Any], min_version: Optional[int] = None,
+                   name: str = CLIENTS_DATASET) -> Any:
+    """
+    Run `fn(engine)` on the replica when it is usable, else on the primary.
+
+    A replica error is recorded on the replica breaker and the read is retried
+    on the primary, so callers only ever see primary failures.
+    """
+    engine, target = choose_read_engine(min_version, name)
+    if target == REPLICA_BIND:
+        try:
+            result = fn(engine)
+            replica_breaker.record_success()
+            return result
+        except Exception as e:
+            replica_breaker.record_failure()
+            logger.warning(f"Replica read failed, retrying on primary: {e}")
+    return fn(db.engine)
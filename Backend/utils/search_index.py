@@ -0,0 +1,196 @@
+"""
+In-Memory Client Search Index
+
+Three structures over the shared client frame:
+
+* a hash map from client id to row position, for O(1) profile lookups;
+* a sorted array of client ids (CIFs) with their row positions, so an id
+  prefix becomes a range found by two binary searches;
+* an inverted index from lower-cased Occupation / Branch_Location tokens to
+  sorted row positions, intersected for multi-token queries.
+
+On ingest the index is updated incrementally when the new frame extends the
+previous one: this is the common upload case, where the DB keeps existing
+rows in place and appends new clients. Appended ids are merged into the
+sorted array, and only rows whose tokenized fields changed move between
+posting lists. Anything else triggers a full rebuild.
+
+Indexes are never modified once published: extending builds a new index from
+a copy of the previous one. Indexes are kept per frame (weakref-checked), so
+requests still holding the previous frame keep a consistent index for it.
+"""
+
+import re
+import copy
+import threading
+import time
+import logging
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TOKEN_FIELDS = ("Occupation", "Branch_Location")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+MAX_INDEXES = 4
+
+_lock = threading.Lock()
+_current = None  # ClientSearchIndex for the most recent frame
+_indexes: "OrderedDict[int, ClientSearchIndex]" = OrderedDict()  # id(frame) -> index
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def _text_values(series: pd.Series) -> np.ndarray:
+    return series.astype(str).to_numpy(dtype=object)
+
+
+class ClientSearchIndex:
+    def __init__(self, df: pd.DataFrame):
+        self._frame = weakref.ref(df)
+        self.n_rows = len(df)
+        self.row_ids = _text_values(df["client_id"]) if "client_id" in df.columns else np.array([], dtype=object)
+        self.positions: Dict[str, int] = {cid: pos for pos, cid in enumerate(self.row_ids)}
+        order = np.argsort(self.row_ids, kind="stable")
+        self.sorted_ids = self.row_ids[order]
+        self.sorted_pos = order.astype(np.int64)
+        self.fields = {col: _text_values(df[col]) for col in TOKEN_FIELDS if col in df.columns}
+        self.postings: Dict[str, np.ndarray] = {}
+        self._index_rows(np.arange(self.n_rows))
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        return self._frame() is df
+
+    def _index_rows(self, positions: np.ndarray) -> None:
+        """Add `positions` to the posting lists of their tokens."""
+        additions: Dict[str, List[np.ndarray]] = {}
+        for values in self.fields.values():
+            # Tokenize each distinct value once, then fan out by position
+            subset = values[positions]
+            uniques, inverse = np.unique(subset.astype(str), return_inverse=True)
+            for u, value in enumerate(uniques):
+                rows = positions[inverse == u]
+                for token in set(tokenize(value)):
+                    additions.setdefault(token, []).append(rows)
+        for token, chunks in additions.items():
+            merged = np.concatenate(chunks + ([self.postings[token]] if token in self.postings else []))
+            self.postings[token] = np.unique(merged)
+
+    def _unindex_rows(self, positions: np.ndarray) -> None:
+        for token in list(self.postings):
+            remaining = np.setdiff1d(self.postings[token], positions, assume_unique=True)
+            if len(remaining):
+                self.postings[token] = remaining
+            else:
+                del self.postings[token]
+
+    def extended(self, df: pd.DataFrame) -> Optional["ClientSearchIndex"]:
+        """
+        New index for `df` if it is this frame plus appended rows, built from
+        a copy of this one (which is left untouched). Returns None when a full
+        rebuild is needed instead.
+        """
+        if "client_id" not in df.columns or len(df) < self.n_rows:
+            return None
+        new_ids = _text_values(df["client_id"])
+        if not np.array_equal(new_ids[:self.n_rows], self.row_ids):
+            return None
+
+        new_fields = {col: _text_values(df[col]) for col in TOKEN_FIELDS if col in df.columns}
+        if set(new_fields) != set(self.fields):
+            return None
+
+        index = copy.copy(self)
+        index.positions = dict(self.positions)
+        index.postings = dict(self.postings)
+        index._apply_extension(df, new_ids, new_fields)
+        return index
+
+    def _apply_extension(self, df, new_ids, new_fields) -> None:
+        # Arrays are only ever replaced here, never written to in place
+        old_n = self.n_rows
+
+        changed = np.zeros(old_n, dtype=bool)
+        for col, values in new_fields.items():
+            changed |= values[:old_n] != self.fields[col]
+        changed_pos = np.flatnonzero(changed)
+
+        if len(changed_pos):
+            self._unindex_rows(changed_pos)
+
+        # Merge appended ids into the sorted id array
+        appended = np.arange(old_n, len(df))
+        if len(appended):
+            app_ids = new_ids[appended]
+            order = np.argsort(app_ids, kind="stable")
+            app_ids, app_pos = app_ids[order], appended[order]
+            at = np.searchsorted(self.sorted_ids, app_ids, side="right")
+            self.sorted_ids = np.insert(self.sorted_ids, at, app_ids)
+            self.sorted_pos = np.insert(self.sorted_pos, at, app_pos)
+
+        self.positions.update((new_ids[pos], int(pos)) for pos in appended)
+        self.row_ids = new_ids
+        self.fields = new_fields
+        self.n_rows = len(df)
+        self._frame = weakref.ref(df)
+        self._index_rows(np.concatenate([changed_pos, appended]).astype(np.int64))
+        logger.info(f"Search index extended: {len(appended)} new, {len(changed_pos)} changed rows")
+
+    def position(self, client_id) -> Optional[int]:
+        """Row position of `client_id` in the frame, or None."""
+        return self.positions.get(str(client_id))
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = int(np.searchsorted(self.sorted_ids, prefix, side="left"))
+        hi = int(np.searchsorted(self.sorted_ids, prefix + "\uffff", side="left"))
+        return lo, hi
+
+    def search(self, prefix: str = "", text: str = "", page: int = 1,
+               per_page: int = 20) -> Tuple[np.ndarray, int]:
+        """Return (row positions for the page, total hits), ordered by client id."""
+        lo, hi = self.prefix_range(prefix) if prefix else (0, len(self.sorted_ids))
+        tokens = tokenize(text)
+        start = (page - 1) * per_page
+
+        if not tokens:
+            return self.sorted_pos[lo + start:min(lo + start + per_page, hi)], hi - lo
+
+        matches: Optional[np.ndarray] = None
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                return np.array([], dtype=np.int64), 0
+            matches = posting if matches is None else np.intersect1d(matches, posting, assume_unique=True)
+
+        # Keep id order: filter the (id-sorted) prefix range by token membership
+        candidates = self.sorted_pos[lo:hi]
+        hits = candidates[np.isin(candidates, matches, assume_unique=True)]
+        return hits[start:start + per_page], len(hits)
+
+
+def get_search_index(df: pd.DataFrame) -> ClientSearchIndex:
+    """Search index for `df`, extended incrementally from the latest one."""
+    global _current
+    with _lock:
+        index = _indexes.get(id(df))
+        if index is not None and index.covers(df):
+            _indexes.move_to_end(id(df))
+            return index
+
+        started = time.perf_counter()
+        index = _current.extended(df) if _current is not None else None
+        if index is None:
+            index = ClientSearchIndex(df)
+            logger.info(f"Search index rebuilt for {len(df)} rows in {(time.perf_counter() - started) * 1000:.1f} ms")
+        _indexes[id(df)] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+        _current = index
+        return index